@@ -0,0 +1,117 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/17 21:48:19
+@Author   :   QuYue
+@File     :   bench_startup.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   start-up benchmark of the CLI (import and init time of gdrivetools.cli:main)
+
+Every case runs in a fresh interpreter, so module caches do not hide the
+cost of a cold start. No network is used: the init case builds the Drive
+service from a cached (non-expired) token.
+
+    python benchmarks/bench_startup.py            # 10 runs per case
+    python benchmarks/bench_startup.py -n 30
+'''
+
+
+#%% Import Packages
+# Basic
+import os
+import sys
+import json
+import shutil
+import argparse
+import datetime
+import tempfile
+import statistics
+import subprocess
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+#%% Cases
+# Each snippet prints the seconds it measured
+CASES = {
+    "import gdrivetools.cli": """
+import time; t = time.perf_counter()
+import gdrivetools.cli
+print(time.perf_counter() - t)
+""",
+    "cli --help": """
+import time, io, contextlib; t = time.perf_counter()
+from gdrivetools.cli import main
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        main(["--help"])
+    except SystemExit:
+        pass
+print(time.perf_counter() - t)
+""",
+    "import gdrivetools.core": """
+import time; t = time.perf_counter()
+import gdrivetools.core
+print(time.perf_counter() - t)
+""",
+    "GoogleDriveTools() (cached token)": """
+import time, io, contextlib; t = time.perf_counter()
+from gdrivetools import GoogleDriveTools
+with contextlib.redirect_stdout(io.StringIO()):
+    gdt = GoogleDriveTools(settings_path="settings.yaml", log="off")
+    gdt.service.files()
+print(time.perf_counter() - t)
+""",
+}
+
+
+def make_workdir() -> str:
+    # settings.yaml, credentials and a token valid for a day, all in a temporary folder
+    workdir = tempfile.mkdtemp(prefix="gdt-bench-")
+    expiry = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+    with open(os.path.join(workdir, "token.json"), "w", encoding="utf-8") as f:
+        json.dump({"token": "bench", "refresh_token": "bench", "client_id": "bench", "client_secret": "bench",
+                   "token_uri": "https://oauth2.googleapis.com/token",
+                   "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ")}, f)
+    with open(os.path.join(workdir, "credentials.json"), "w", encoding="utf-8") as f:
+        json.dump({"installed": {"client_id": "bench", "client_secret": "bench"}}, f)
+    with open(os.path.join(workdir, "settings.yaml"), "w", encoding="utf-8") as f:
+        f.write("google_drive:\n"
+                "  credentials_file: credentials.json\n"
+                "  save_token: True\n"
+                "  save_token_file: token.json\n"
+                "  oauth_scope: [https://www.googleapis.com/auth/drive.file]\n"
+                "proxy: null\n"
+                "log: null\n"
+                "upload: {chunksize: 10485760}\n"
+                "download: {chunksize: 10485760, save_local_dir: ./download}\n"
+                "cache: {enabled: False}\n")
+    return workdir
+
+
+def run_case(code: str, workdir: str) -> float:
+    env = dict(os.environ, PYTHONPATH=parent_dir + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+#%% Main
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Start-up time of gdrive-tools (fresh interpreter per run).")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Runs per case (default 10).")
+    args = parser.parse_args(argv)
+
+    workdir = make_workdir()
+    try:
+        print(f"{'case':<36}{'median':>10}{'min':>10}{'max':>10}   ({args.runs} runs, ms)")
+        for name, code in CASES.items():
+            times = [run_case(code, workdir) * 1000 for _ in range(args.runs)]
+            print(f"{name:<36}{statistics.median(times):>10.1f}{min(times):>10.1f}{max(times):>10.1f}")
+    finally:
+        # Settings and token copies are not left behind
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
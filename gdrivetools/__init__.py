@@ -8,5 +8,12 @@
 '''
 
 #%% Import Packages
-from .core import GoogleDriveTools
-__all__ = ["GoogleDriveTools"]
\ No newline at end of file
+__all__ = ["GoogleDriveTools"]
+
+
+def __getattr__(name):
+    # GoogleDriveTools is imported on first access, so 'import gdrivetools.cli' stays light
+    if name == "GoogleDriveTools":
+        from .core import GoogleDriveTools
+        return GoogleDriveTools
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
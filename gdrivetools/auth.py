@@ -0,0 +1,142 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/17 21:03:48
+@Author   :   QuYue
+@File     :   auth.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   OAuth token refresh shared across threads and processes
+'''
+
+
+#%% Import Packages
+# Basic
+import json
+import logging
+import datetime
+import threading
+
+# Google API
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+# Self-defined
+from .state import FileLock, write_json_atomic
+
+
+#%% CredentialManager
+class CredentialManager:
+    """
+    Keeps one OAuth Credentials object fresh for all HTTP clients of the process.
+
+    A background thread refreshes the token `margin` seconds before it
+    expires. Refreshes are serialized across processes by a lock on
+    '<token file>.lock': whoever holds the lock first re-reads the token
+    file, adopts a token another process has just refreshed, or refreshes
+    and saves it with an atomic rename. The Credentials object is updated in
+    place, so every service and transport built on it picks up the new
+    token at its next request.
+    """
+    # Wait after a failed refresh, and between checks of a token without expiry
+    RETRY_SECONDS = 60
+    IDLE_SECONDS = 3600
+
+    def __init__(self, creds: Credentials, token_path: str | None, scopes=None, margin: float = 300,
+                 logger: logging.Logger | None = None):
+        self.creds = creds
+        self.token_path = token_path
+        self.scopes = scopes
+        self.margin = margin
+        self.logger = logger or logging.getLogger("gdrive")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ----- refresh -----
+    @staticmethod
+    def _now() -> datetime.datetime:
+        # google-auth keeps expiry as a naive UTC datetime
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+    def _expiring(self, creds: Credentials) -> bool:
+        if not creds.token:
+            return True
+        if creds.expiry is None:
+            return False
+        return (creds.expiry - self._now()).total_seconds() <= self.margin
+
+    def ensure_fresh(self, force: bool = False):
+        # Refresh the token if it expires within the margin (or always, with force)
+        with self._lock:
+            if not force and not self._expiring(self.creds):
+                return
+            if not self.token_path:
+                self.creds.refresh(Request())
+                self.logger.info("Token refreshed successfully.")
+                return
+            with FileLock(self.token_path + ".lock"):
+                disk = self._load()
+                if disk is not None and disk.token != self.creds.token and not self._expiring(disk):
+                    self._adopt(disk)
+                    self.logger.info("Token refreshed by another process, loaded from %s", self.token_path)
+                    return
+                if disk is not None and disk.refresh_token and disk.refresh_token != self.creds.refresh_token:
+                    # The refresh token was rotated by another process
+                    self._adopt(disk)
+                self.creds.refresh(Request())
+                self._save_locked()
+                self.logger.info("Token refreshed successfully.")
+
+    def _adopt(self, other: Credentials):
+        # Update the shared Credentials in place: HTTP clients keep a reference to this object
+        self.creds.token = other.token
+        self.creds.expiry = other.expiry
+        if other.refresh_token:
+            self.creds._refresh_token = other.refresh_token
+
+    # ----- token file -----
+    def _load(self) -> Credentials | None:
+        try:
+            return Credentials.from_authorized_user_file(self.token_path, self.scopes)
+        except (OSError, ValueError):
+            return None
+
+    def save(self):
+        # Write the token file (under the lock, with an atomic rename)
+        if not self.token_path:
+            return
+        with self._lock, FileLock(self.token_path + ".lock"):
+            self._save_locked()
+
+    def _save_locked(self):
+        write_json_atomic(self.token_path, json.loads(self.creds.to_json()))
+        self.logger.info("Token saved to %s", self.token_path)
+
+    # ----- background refresh -----
+    def start(self):
+        if self._thread is not None or not self.creds.refresh_token:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gdrive-token", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _seconds_until_refresh(self) -> float:
+        if self.creds.expiry is None:
+            return self.IDLE_SECONDS
+        left = (self.creds.expiry - self._now()).total_seconds() - self.margin
+        return max(left, 0.0)
+
+    def _run(self):
+        wait = self._seconds_until_refresh()
+        while not self._stop.wait(wait):
+            try:
+                self.ensure_fresh()
+                wait = max(self._seconds_until_refresh(), self.RETRY_SECONDS)
+            except Exception as e:
+                self.logger.warning("Background token refresh failed, retrying in %ds: %s", self.RETRY_SECONDS, e)
+                wait = self.RETRY_SECONDS
@@ -16,21 +16,50 @@ gdrive-tools upload -n a.txt b.txt
 # Upload with custom save names and folder ID
 gdrive-tools upload -n a.txt b.txt -s a_drive.txt b_drive.txt -i <folder_id>
 
+# Upload many files with 8 parallel workers
+gdrive-tools upload -n *.csv -j 8
+
+# Upload standard input as a stream (constant memory)
+pg_dump mydb | gdrive-tools upload -n - -s db.dump
+
+# Compress on the fly while uploading (downloads decompress transparently)
+gdrive-tools upload -n export.csv --compress zstd
+
+# Skip files whose content is already in the target folder
+gdrive-tools upload -n build/*.whl -i <folder_id> --dedup skip
+
 # Download one file by file_id
 gdrive-tools download -f 1AbCdEfGhIjK
 
 # Download multiple files into a specific directory
 gdrive-tools download -f id1 id2 id3 -o ./downloads
+
+# Stream a file to standard output (logs go to stderr)
+gdrive-tools download -f 1AbCdEfGhIjK -o - | tar x
+
+# Incrementally sync a local folder into a Drive folder
+gdrive-tools sync ./backup <folder_id> --delete
+
+# Keep a local mirror of a Drive folder up to date
+gdrive-tools mirror <folder_id> ./mirror
+
+# Upload at most 50 MB/s
+gdrive-tools --limit-rate 50M upload -n *.tar
+
+# Keep a warm instance running, and send jobs to it (no start-up cost per call)
+gdrive-tools serve &
+gdrive-tools --daemon upload -n data.zip
 """
 
 #%% Import Packages
 # Basic
 import os
 import sys
+import json
 import argparse
 
 # Self-defined
-from .core import GoogleDriveTools
+# (.core, and the Google API client with it, is imported once a command runs: '--help' stays fast)
 from .utils import AttrDict
 
 
@@ -64,6 +93,7 @@ def build_parser() -> argparse.ArgumentParser:
             "Override path to log file."
             "If omitted, uses settings.log."
             "If set to 'off', logs will be printed to standard output."
+            "If set to 'stderr', logs will be printed to standard error."
         )
     )
     parser.add_argument(
@@ -84,12 +114,47 @@ def build_parser() -> argparse.ArgumentParser:
             "If omitted, uses settings.google_drive.remote."
         )
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help=(
+            "Bypass the on-disk metadata index and list folders from Google Drive."
+            "If omitted, uses settings.cache.enabled."
+        )
+    )
+    parser.add_argument(
+        "--limit-rate",
+        dest="limit_rate",
+        help=(
+            "Limit the bandwidth of all uploads and downloads, in bytes per second (K, M, G suffixes). "
+            "If omitted, uses settings.upload.max_bytes_per_sec and settings.download.max_bytes_per_sec. "
+            "If set to 'off', transfers are not limited. "
+            "e.g., --limit-rate 50M"
+        )
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help=(
+            "Send the command to a running 'gdrive-tools serve' instead of running it here. "
+            "Settings, credentials, proxy and log of the daemon are used."
+        )
+    )
+    parser.add_argument(
+        "--socket",
+        help=(
+            "Unix socket of the daemon (for 'serve' and --daemon). "
+            "If omitted, uses $XDG_RUNTIME_DIR/gdrive-tools.sock, or daemon.sock in a private "
+            "gdrive-tools-<uid> folder of the temporary directory."
+        )
+    )
     
     # ----- Subcommands -----
     subparsers = parser.add_subparsers(
         dest="command",
         required=True,
-        help="Sub-commands: upload, download"
+        help="Sub-commands: upload, download, sync, mirror, serve, limit-rate"
     )
 
     # ---------- Upload subcommand ----------
@@ -103,8 +168,10 @@ def build_parser() -> argparse.ArgumentParser:
         help=(
             "One or more local file paths to upload. "
             "If omitted, uses settings.upload.local_file. "
+            "'-' reads standard input as a stream (requires -s). "
             "e.g., -n data.zip "
-            "or -n a.txt b.txt"
+            "or -n a.txt b.txt "
+            "or -n - -s db.dump"
         )
     )
     upload_parser.add_argument(
@@ -126,6 +193,36 @@ def build_parser() -> argparse.ArgumentParser:
             "e.g., -i 1i93YFUQK5fbJUss_3rhwOyuAkMQgZjJk"
         )
     )
+    upload_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        dest="jobs",
+        help=(
+            "Number of files to upload in parallel. "
+            "If omitted, uses settings.upload.max_workers (default 1). "
+            "e.g., -j 8"
+        )
+    )
+    upload_parser.add_argument(
+        "--compress",
+        choices=["zstd", "gzip"],
+        help=(
+            "Compress files on the fly while uploading (zstd requires the 'zstandard' package). "
+            "Downloads decompress them transparently. "
+            "If omitted, uses settings.upload.compress (default: no compression)."
+        )
+    )
+    upload_parser.add_argument(
+        "--dedup",
+        choices=["skip", "copy"],
+        help=(
+            "Compare MD5 and size with the files already in the target folder. "
+            "'skip' does not upload files whose content is there; "
+            "'copy' makes a server-side copy under the new name instead. "
+            "Cannot be combined with --compress. "
+            "If omitted, uses settings.upload.dedup (default: always upload)."
+        )
+    )
 
     # ---------- Download subcommand ----------
     download_parser = subparsers.add_parser(
@@ -150,13 +247,179 @@ def build_parser() -> argparse.ArgumentParser:
             "Local directory to save downloaded files. "
             "If omitted, uses settings.download.save_local_dir. "
             "Directory will be created automatically if it does not exist. "
-            "e.g., -o ./downloads"
+            "'-' writes the file content to standard output instead (logs go to stderr). "
+            "e.g., -o ./downloads or -o -"
+        )
+    )
+    download_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        dest="jobs",
+        help=(
+            "Number of files to download in parallel. "
+            "If omitted, uses settings.download.max_workers (default 1). "
+            "e.g., -j 8"
+        )
+    )
+    download_parser.add_argument(
+        "--segments",
+        type=int,
+        help=(
+            "Number of parallel byte-range connections per large file. "
+            "If omitted, uses settings.download.segments (default 1). "
+            "Only files of at least settings.download.segment_min_size are split. "
+            "e.g., --segments 8"
+        )
+    )
+    # ---------- Sync subcommand ----------
+    sync_parser = subparsers.add_parser(
+        "sync",
+        help="Incrementally upload a local folder, skipping unchanged files."
+    )
+    sync_parser.add_argument(
+        "local_dir",
+        help="Local folder whose content is synced to Google Drive."
+    )
+    sync_parser.add_argument(
+        "folder_id",
+        nargs="?",
+        help=(
+            "Google Drive folder ID to sync into. "
+            "If omitted, uses settings.upload.save_folder_id or the Drive root directory."
+        )
+    )
+    sync_parser.add_argument(
+        "--delete",
+        action="store_true",
+        default=None,
+        help=(
+            "Move remote files that no longer exist locally to the trash. "
+            "If omitted, uses settings.sync.delete."
+        )
+    )
+    sync_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        dest="jobs",
+        help=(
+            "Number of files to upload in parallel. "
+            "If omitted, uses settings.upload.max_workers (default 1)."
+        )
+    )
+    # ---------- Mirror subcommand ----------
+    mirror_parser = subparsers.add_parser(
+        "mirror",
+        help="Keep a local mirror of a Google Drive folder up to date."
+    )
+    mirror_parser.add_argument(
+        "folder_id",
+        help="Google Drive folder ID to mirror."
+    )
+    mirror_parser.add_argument(
+        "local_dir",
+        help=(
+            "Local directory holding the mirror. "
+            "The first run downloads everything; later runs only apply changes reported by the Changes API."
+        )
+    )
+    mirror_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        dest="jobs",
+        help=(
+            "Number of files to download in parallel. "
+            "If omitted, uses settings.download.max_workers (default 1)."
+        )
+    )
+    # ---------- Serve subcommand ----------
+    subparsers.add_parser(
+        "serve",
+        help=(
+            "Run as a daemon: keep one authenticated instance warm and run jobs sent "
+            "with 'gdrive-tools --daemon ...' over a Unix socket."
+        )
+    )
+    # ---------- Limit-rate subcommand ----------
+    limit_rate_parser = subparsers.add_parser(
+        "limit-rate",
+        help=(
+            "Change the bandwidth limit of a running daemon (with --daemon); "
+            "it applies to all of its jobs, including the ones already running."
+        )
+    )
+    limit_rate_parser.add_argument(
+        "rate",
+        help=(
+            "Bytes per second (K, M, G suffixes), or 'off' to remove the limit. "
+            "e.g., gdrive-tools --daemon limit-rate 50M"
         )
     )
     # Return the constructed parser
     return parser
 
 
+#%% Daemon Client
+def run_on_daemon(args, parser: argparse.ArgumentParser) -> int:
+    # Send the parsed command to a running daemon; local paths are made absolute for it
+    from .daemon import DaemonClient, DaemonError
+
+    def absolute(path):
+        return os.path.abspath(path) if path else path
+
+    if args.limit_rate:
+        # The limiters are shared by all jobs of the daemon: a per-job limit cannot be honoured
+        parser.error("--limit-rate is not supported with --daemon; "
+                     "use 'gdrive-tools --daemon limit-rate RATE' to change the limit of the daemon.")
+    if args.command == "limit-rate":
+        command, job = "set_rate_limit", {"max_bytes_per_sec": args.rate}
+    elif args.command == "upload":
+        if args.name is not None and "-" in args.name:
+            parser.error("uploading standard input ('-n -') is not supported with --daemon.")
+        command, job = "upload", {
+            "local_file": [absolute(f) for f in args.name] if args.name else None,
+            "save_file_name": args.save_name,
+            "folder_id": args.folder_id,
+            "max_workers": args.jobs,
+            "compress": args.compress,
+            "dedup": args.dedup,
+        }
+    elif args.command == "download":
+        if args.out_dir == "-":
+            parser.error("streaming to standard output ('-o -') is not supported with --daemon.")
+        command, job = "download", {
+            "file_id": args.file_id,
+            "save_local_dir": absolute(args.out_dir),
+            "max_workers": args.jobs,
+            "segments": args.segments,
+        }
+    elif args.command == "sync":
+        command, job = "sync", {
+            "local_dir": absolute(args.local_dir),
+            "folder_id": args.folder_id,
+            "delete": args.delete,
+            "max_workers": args.jobs,
+        }
+    elif args.command == "mirror":
+        command, job = "mirror", {
+            "folder_id": args.folder_id,
+            "local_dir": absolute(args.local_dir),
+            "max_workers": args.jobs,
+        }
+    else:
+        parser.error(f"'{args.command}' cannot be sent to a daemon.")
+        return 1
+
+    try:
+        result, errors = DaemonClient(args.socket).call(command, **job)
+    except DaemonError as e:
+        print(f"gdrive-tools: {e}", file=sys.stderr)
+        return 1
+    for item, error in errors:
+        print(f"Failed: {item} ({error})", file=sys.stderr)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
 #%% Main Function
 def main(argv: list[str] | None = None) -> int:
     if argv is None:
@@ -164,6 +427,11 @@ def main(argv: list[str] | None = None) -> int:
 
     parser = build_parser()
     args = parser.parse_args(argv)
+    if args.daemon:
+        return run_on_daemon(args, parser)
+    if args.command == "limit-rate":
+        parser.error("limit-rate changes the limit of a running daemon and needs --daemon; "
+                     "use the global --limit-rate option for a single command.")
     gdt_args = {}
     # ---------- Step1. Get Settings and Initialize GoogleDriveTools ----------
     # ----- step 1.1 get base settings from settings.yaml -----
@@ -185,33 +453,93 @@ def main(argv: list[str] | None = None) -> int:
     # proxy
     if args.proxy:
         gdt_args['proxy'] = args.proxy
+    # cache
+    if args.no_cache:
+        gdt_args['cache'] = False
+    # bandwidth
+    if args.limit_rate:
+        gdt_args['limit_rate'] = args.limit_rate
+    # stdout carries file content: keep logs and settings off it
+    to_stdout = args.command == "download" and args.out_dir == "-"
+    stdout = sys.stdout.buffer
+    if to_stdout and not args.log:
+        gdt_args['log'] = 'stderr'
 
     # ----- step 1.2 initialize GoogleDriveTools -----
-    gdt = GoogleDriveTools(**gdt_args, show_settings=True)
+    from .core import GoogleDriveTools
+    gdt = GoogleDriveTools(**gdt_args, show_settings=not to_stdout)
 
     # ---------- Step 2. Handle Sub-Commands ----------
+    if args.command == "serve":
+        from .daemon import serve
+        return serve(gdt, args.socket)
     # ----- step 2.1 upload ----- 
     if args.command == "upload":
         # args.name: list[str]
         # args.save_name: list[str] or None
         # args.folder_id: str or None
+        # args.jobs: int or None
         local_files = args.name
         save_names = args.save_name
+        if local_files is not None and "-" in local_files:
+            # '-' streams standard input; its Drive name must be given with -s
+            if not save_names or len(save_names) != len(local_files):
+                parser.error("uploading '-' (standard input) requires -s with a name for every file.")
+            local_files = [sys.stdin.buffer if f == "-" else f for f in local_files]
         folder_id = args.folder_id
         # Call upload
         results = gdt.upload(
             local_file=local_files,
             save_file_name=save_names,
-            folder_id=folder_id
+            folder_id=folder_id,
+            max_workers=args.jobs,
+            compress=args.compress,
+            dedup=args.dedup
         )
     elif args.command == "download":
         # args.file_id: list[str]
         # args.out_dir: str or None
+        # args.jobs: int or None
         file_ids = args.file_id
         out_dir = args.out_dir
+        if to_stdout:
+            if file_ids is None:
+                file_ids = gdt.settings.download.file_id
+            if isinstance(file_ids, str):
+                file_ids = [file_ids]
+            for file_id in file_ids:
+                try:
+                    gdt.download_to(file_id, stdout)
+                except BrokenPipeError:
+                    # The reader stopped early (e.g. '| head'): not an error of ours
+                    return 0
+                except Exception as e:
+                    gdt.logger.error("Streaming failed for file_id=%s: %s", file_id, e)
+                    return 1
+            return 0
         results = gdt.download(
             file_id=file_ids,
-            save_local_dir=out_dir
+            save_local_dir=out_dir,
+            max_workers=args.jobs,
+            segments=args.segments
+        )
+    elif args.command == "sync":
+        # args.local_dir: str
+        # args.folder_id: str or None
+        # args.delete: True or None
+        results = gdt.sync_up(
+            local_dir=args.local_dir,
+            folder_id=args.folder_id,
+            delete=args.delete,
+            max_workers=args.jobs
+        )
+    elif args.command == "mirror":
+        # args.folder_id: str
+        # args.local_dir: str
+        results = gdt.mirror_down(
+            folder_id=args.folder_id,
+            local_dir=args.local_dir,
+            max_workers=args.jobs
         )
     else:
         # 理论上不会到这里，因为 subparsers 设置了 required=True
@@ -14,20 +14,38 @@ import sys
 import io
 import logging
 import socket
-import yaml
-import socks
-import httplib2
+import time
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # Google API
-from google.auth.transport.requests import Request
+# (yaml, socks, httplib2, google_auth_oauthlib and googleapiclient.discovery are
+#  imported where they are used, to keep the CLI start-up fast)
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google_auth_httplib2 import AuthorizedHttp
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
 
 # Self-defined
-from .utils import AttrDict, human_size
+from .utils import AttrDict, human_size, parse_size, scan_local, file_md5
+from .transfer import (AUTO, UPLOAD_CHUNK_MULTIPLE, ChunkTuner, StreamUpload, parse_chunksize,
+                       is_stream, stream_name, CODECS, CODEC_MIMETYPES, APP_CODEC, APP_SIZE,
+                       CompressedReader, compressor, compressed_codec, decompressor,
+                       upload_limiter, download_limiter)
+from .state import (UploadJournal, SyncState, MirrorState, MetadataIndex,
+                    load_part_tag, save_part_tag, remove_part_tag)
+from .retry import RetryPolicy, TransientError, api_limiter
+from .transport import PooledHttp
+from .auth import CredentialManager
+
+
+#%% Discovery
+def build_drive(http):
+    # Drive v3 service from the discovery document bundled with googleapiclient (no network)
+    from googleapiclient.discovery import build
+    return build("drive", "v3", http=http, cache_discovery=False, static_discovery=True)
 
 
 #%% GoogleDriveTools
@@ -36,6 +54,18 @@ class GoogleDriveTools:
     High-level wrapper around Google Drive API for uploading and downloading
     files using settings.yaml and optional proxy.
     """
+    # Drive accepts at most 100 calls in one batch request
+    BATCH_SIZE = 100
+    # Metadata needed to download (and resume) a file
+    DOWNLOAD_FIELDS = "id,name,mimeType,size,md5Checksum,modifiedTime,appProperties"
+    FOLDER_MIME = "application/vnd.google-apps.folder"
+    # files.list: largest page Drive returns, and folders OR'ed into one query
+    # (50 IDs of ~45 characters keep the query well under Drive's length limit)
+    LIST_PAGE_SIZE = 1000
+    LIST_MAX_PARENTS = 50
+    # Metadata of changes.list entries (enough to update the mirror and the metadata index)
+    CHANGE_FILE_FIELDS = "id,name,mimeType,parents,trashed,size,md5Checksum,modifiedTime,appProperties"
+    CHANGE_FIELDS = f"nextPageToken,newStartPageToken,changes(changeType,fileId,removed,file({CHANGE_FILE_FIELDS}))"
 
     def __init__(self, settings_path: str | None = None, *,
         # Manual override parameters:
@@ -43,6 +73,8 @@ class GoogleDriveTools:
         proxy=None,
         remote=None,
         log=None,
+        cache: bool | None = None,
+        limit_rate=None,
         show_settings: bool = False):
         """
         Initialize GoogleDriveTools.
@@ -65,8 +97,15 @@ class GoogleDriveTools:
             Whether to use remote OAuth authentication (manual URL copy) instead of local server. If None, use setting.google_drive.remote.
         log : str | None   
             Log file path.
-            log = None (use setting.log) | "off" (use stdout) | other string (override setting.log).
+            log = None (use setting.log) | "off" (use stdout) | "stderr" (use stderr) | other string (override setting.log).
             e.g., "log.txt"
+        cache : bool | None
+            Whether to use the on-disk metadata index of Drive folders.
+            cache = None (use setting.cache.enabled) | False (bypass the index) | True.
+        limit_rate : int | str | None
+            Bandwidth limit of uploads and downloads, in bytes per second.
+            limit_rate = None (use setting.upload/download.max_bytes_per_sec) | "off" (no limit) | size, e.g. "50M".
+            The limit applies to the whole process (shared with other instances).
         show_settings : bool
             Whether to print loaded settings to console. Default: False.
         """
@@ -86,7 +125,8 @@ class GoogleDriveTools:
                         "save_token": True,
                         "save_token_file": './Json/token.json',
                         "remote": False,
-                        "oauth_scope": ["https://www.googleapis.com/auth/drive.file"]
+                        "oauth_scope": ["https://www.googleapis.com/auth/drive.file"],
+                        "refresh_before_expiry": 300,
                     }),
                     "proxy": None,
                     "log": None,
@@ -94,12 +134,50 @@ class GoogleDriveTools:
                         "local_file": None,
                         "save_file_name": None,
                         "save_folder_id": None,
-                        "chunksize": 10485760,  # 10 MB
+                        "chunksize": 10485760,  # 10 MB, or "auto"
+                        "chunksize_min": 262144,  # 256 KB
+                        "chunksize_max": 134217728,  # 128 MB
+                        "simple_upload_max_bytes": 5242880,  # 5 MB
+                        "max_workers": 1,
+                        "resume": True,
+                        "journal_file": None,
+                        "compress": None,
+                        "dedup": None,
+                        "max_bytes_per_sec": None,
                     }),
                     "download": AttrDict({
                         "save_local_dir": './download',
                         "file_id": None,    
-                        "chunksize": 10485760,  # 10 MB 
+                        "chunksize": 10485760,  # 10 MB, or "auto"
+                        "chunksize_min": 262144,  # 256 KB
+                        "chunksize_max": 134217728,  # 128 MB
+                        "max_workers": 1,
+                        "segments": 1,
+                        "segment_min_size": 104857600,  # 100 MB
+                        "resume": True,
+                        "max_bytes_per_sec": None,
+                    }),
+                    "sync": AttrDict({
+                        "state_file": None,
+                        "delete": False,
+                    }),
+                    "cache": AttrDict({
+                        "enabled": True,
+                        "index_file": None,
+                        "refresh_interval": 30,
+                    }),
+                    "transport": AttrDict({
+                        "backend": "pooled",
+                        "pool_size": 10,
+                        "keep_alive": True,
+                        "connect_timeout": 30,
+                        "read_timeout": 120,
+                    }),
+                    "api": AttrDict({
+                        "max_retries": 5,
+                        "backoff_base": 1.0,
+                        "backoff_max": 64,
+                        "queries_per_100_seconds": None,
                     })
                 })
             if show_settings:
@@ -128,6 +206,11 @@ class GoogleDriveTools:
             if log.lower() == "off":
                 log = None
             self.settings.log = log
+        if cache is not None:
+            self.settings.setdefault("cache", AttrDict()).enabled = cache
+        if limit_rate is not None:
+            self.settings.upload.max_bytes_per_sec = parse_size(limit_rate)
+            self.settings.download.max_bytes_per_sec = parse_size(limit_rate)
         if show_settings:
             if self.settings.log is None:
                 print('===== log: off (stdout)')
@@ -143,9 +226,28 @@ class GoogleDriveTools:
         self.set_proxy(self.settings.proxy)
 
         # ---------- Step 4. Build Drive service ----------
+        self._local = threading.local()  # per-worker Drive service
+        self._http = None  # pooled transport shared by all Drive services
+        self._pooled_service = None  # the Drive service on self._http
+        self.credentials = None  # CredentialManager of self.creds
+        self.retry = self._build_retry_policy()
+        # The bandwidth limiters are process-wide: left alone unless a limit is configured
+        for kind in ("upload", "download"):
+            rate = limit_rate if limit_rate is not None else self.settings[kind].get("max_bytes_per_sec")
+            if rate is not None:
+                self.set_rate_limit(rate, kind)
+        self.errors = []  # (item, error message) collected from the last batch
+        self.duplicates = {}  # {local path: existing file ID} matched by the last upload(dedup=...)
         self.service = self._build_drive_service()
+        self.journal = self._build_upload_journal()
+        self.index = self._build_metadata_index()
+        self._index_lock = threading.Lock()
+        self._index_checked = None  # time.monotonic() of the last Changes API refresh
+        self._index_failed = None  # time.monotonic() of the last database error of the index
+        self._root_id = None  # real ID of the "root" alias (My Drive), looked up on first use
         
     def load_settings(self, path: str, inplaces: bool = True) -> AttrDict:
+        import yaml
         with open(path, "r", encoding="utf-8") as f:
             data = yaml.safe_load(f)
         if inplaces:
@@ -160,6 +262,10 @@ class GoogleDriveTools:
         # Clear existing handlers
         if logger.hasHandlers():
             logger.handlers.clear()
+        # "stderr" keeps standard output free, e.g. for downloads streamed to stdout
+        to_stderr = isinstance(log_file, str) and log_file.lower() == "stderr"
+        if to_stderr:
+            log_file = None
         # Create log folder if needed
         if log_file:
             log_folder = os.path.dirname(log_file)
@@ -178,7 +284,7 @@ class GoogleDriveTools:
             sys.stdout = logf
             sys.stderr = logf
         else:
-            sh = logging.StreamHandler(sys.stdout)
+            sh = logging.StreamHandler(sys.stderr if to_stderr else sys.stdout)
             sh.setFormatter(formatter)
             logger.addHandler(sh)
         if inplaces:
@@ -217,6 +323,8 @@ class GoogleDriveTools:
         # Build httplib2.ProxyInfo from proxy_str
         if not proxy_str:
             return None
+        import socks
+        import httplib2
 
         SOCKS_MAP = {
             "http": socks.HTTP,
@@ -246,6 +354,9 @@ class GoogleDriveTools:
             if os.path.exists(token_path):
                 os.remove(token_path)
                 self.logger.info("Removed token file: %s", token_path)
+            if self.index is not None:
+                # The next token may belong to another account
+                self._index_call(self.index.clear)
         self.service = self._build_drive_service()
 
 
@@ -270,84 +381,365 @@ class GoogleDriveTools:
                 self.logger.warning("Failed to load token, will re-auth: %s", e)
                 creds = None
 
-        # if no valid credential, attempt refresh or re-authenticate
+        # if the token is missing or about to expire, attempt refresh or re-authenticate
+        manager = None
+        if creds and creds.refresh_token:
+            manager = self._credential_manager(creds)
+            try:
+                # Serialized with other processes sharing the token file
+                manager.ensure_fresh()
+            except Exception as e:
+                self.logger.error("Token refresh failed: %s", e)
+                creds = manager = None
         if not creds or not creds.valid:
-            #  refresh token 
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                    self.logger.info("Token refreshed successfully.")
-                except Exception as e:
-                    self.logger.error("Token refresh failed: %s", e)
-                    creds = None
             # re-authorize using credentials.json
-            if not creds:
-                if not os.path.exists(credentials_path):
-                    self.logger.error(
-                        "Credentials file %s not found. "
-                        "Download it from Google Cloud Console.", credentials_path)
-                    raise FileNotFoundError(credentials_path)
-                flow = InstalledAppFlow.from_client_secrets_file(credentials_path, scopes)
-                if not remote:
-                    self.logger.info("Start OAuth authorization (local login)...")
-                    creds = flow.run_local_server(port=0)
-                else:
-                    os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"  # allow http://localhost callback
-                    self.logger.info("Start OAuth authorization (remote login)...")
-                    flow.redirect_uri = "http://localhost"
-                    auth_url, _ = flow.authorization_url(prompt="consent", access_type="offline")
-                    print("Please go to this URL to authorize the application:", auth_url)
-                    redirected_url = input("Paste redirected URL here: ").strip()
-                    if "code=" not in redirected_url:
-                        raise ValueError("Invalid redirected URL. 'code=' parameter not found.")
-                    flow.fetch_token(authorization_response=redirected_url)
-                    creds = flow.credentials
-                self.logger.info("OAuth authorization completed.")
+            if not os.path.exists(credentials_path):
+                self.logger.error(
+                    "Credentials file %s not found. "
+                    "Download it from Google Cloud Console.", credentials_path)
+                raise FileNotFoundError(credentials_path)
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, scopes)
+            if not remote:
+                self.logger.info("Start OAuth authorization (local login)...")
+                creds = flow.run_local_server(port=0)
+            else:
+                os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"  # allow http://localhost callback
+                self.logger.info("Start OAuth authorization (remote login)...")
+                flow.redirect_uri = "http://localhost"
+                auth_url, _ = flow.authorization_url(prompt="consent", access_type="offline")
+                print("Please go to this URL to authorize the application:", auth_url)
+                redirected_url = input("Paste redirected URL here: ").strip()
+                if "code=" not in redirected_url:
+                    raise ValueError("Invalid redirected URL. 'code=' parameter not found.")
+                flow.fetch_token(authorization_response=redirected_url)
+                creds = flow.credentials
+            self.logger.info("OAuth authorization completed.")
 
             # Save the token for the next run
-            if save_token:
-                with open(token_path, "w", encoding="utf-8") as f:
-                    f.write(creds.to_json())
-                self.logger.info("Token saved to %s", token_path)
+            manager = self._credential_manager(creds)
+            manager.save()
 
-        # ---------- step 3. Build HTTP client: with or without proxy ----------
+        # ---------- step 3. Keep the token fresh in the background ----------
+        # Services and transports share this Credentials object, which is refreshed in place
+        if manager is None:
+            manager = self._credential_manager(creds)
+        if self.credentials is not None:
+            self.credentials.stop()
+        self.credentials = manager
+        manager.start()
+
+        # ---------- step 4. Build service on top of the credentials ----------
+        self.creds = creds
+        return self._build_service(creds)
+
+    def _credential_manager(self, creds) -> CredentialManager:
+        gd = self.settings.google_drive
+        return CredentialManager(creds,
+                                 gd.save_token_file if gd.save_token else None,
+                                 scopes=gd.oauth_scope,
+                                 margin=gd.get("refresh_before_expiry", 300),
+                                 logger=self.logger)
+
+    def _build_service(self, creds, verbose: bool = True):
+        # Build a Drive service on the shared pooled transport, or with its own httplib2 client
+        transport = self.settings.get("transport") or {}
+        if transport.get("backend", "pooled") == "pooled":
+            # The pooled transport is thread-safe: one service, built once, serves every worker
+            if self._http is not None and self._http.credentials is creds:
+                return self._pooled_service
+            if self._http is not None:
+                self._http.close()
+            self._http = PooledHttp(creds,
+                                    pool_size=transport.get("pool_size", 10),
+                                    keep_alive=transport.get("keep_alive", True),
+                                    connect_timeout=transport.get("connect_timeout", 30),
+                                    read_timeout=transport.get("read_timeout", 120),
+                                    proxy=self.proxy)
+            if verbose:
+                self.logger.info("Using pooled connections (pool size %d)%s.",
+                                 transport.get("pool_size", 10),
+                                 " via proxy %s://%s:%s" % (self.proxy["ptype"], self.proxy["host"],
+                                                            self.proxy["port"]) if self.proxy else "")
+            self._pooled_service = build_drive(self._http)
+            if verbose:
+                self.logger.info("Google Drive service built successfully.")
+            return self._pooled_service
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
         if self.proxy:
             base_http = httplib2.Http(timeout=120, proxy_info=self.proxy["info"])
-            self.logger.info("Using proxy connection: %s://%s:%s.",
-                            self.proxy["ptype"], self.proxy["host"], self.proxy["port"])
+            if verbose:
+                self.logger.info("Using proxy connection: %s://%s:%s.",
+                                self.proxy["ptype"], self.proxy["host"], self.proxy["port"])
         else:
             base_http = httplib2.Http(timeout=120)
-            self.logger.info("Using direct connection.")
+            if verbose:
+                self.logger.info("Using direct connection.")
         authed_http = AuthorizedHttp(creds, http=base_http)
         # Disable HTTP 308 redirect handling to avoid issues with some proxies
         base_http.redirect_codes = base_http.redirect_codes - {308}
 
-        service = build("drive", "v3", http=authed_http, cache_discovery=False)
-        self.logger.info("Google Drive service built successfully.")
+        service = build_drive(authed_http)
+        if verbose:
+            self.logger.info("Google Drive service built successfully.")
         return service
 
+    def _build_upload_journal(self) -> UploadJournal | None:
+        # Journal of resumable upload sessions, stored next to the token file by default
+        upload = self.settings.upload
+        if not upload.get("resume", True):
+            return None
+        journal_file = upload.get("journal_file")
+        if not journal_file:
+            token_dir = os.path.dirname(self.settings.google_drive.save_token_file or "")
+            journal_file = os.path.join(token_dir, "upload_sessions.json")
+        return UploadJournal(journal_file)
+
+    def _build_retry_policy(self) -> RetryPolicy:
+        # Backoff of failed API calls, and the process-wide limit on API calls (only set if configured)
+        api = self.settings.get("api") or {}
+        qps = api.get("queries_per_100_seconds")
+        if qps is not None:
+            api_limiter.set_rate(qps / 100 if qps else None)
+        return RetryPolicy(max_retries=api.get("max_retries", 5),
+                           base_delay=api.get("backoff_base", 1.0),
+                           max_delay=api.get("backoff_max", 64),
+                           logger=self.logger)
+
+    def set_rate_limit(self, max_bytes_per_sec, direction: str | None = None):
+        """
+        Limit the bandwidth of all transfers of this process; takes effect at the next chunk.
+
+        Parameters
+        ----------
+        max_bytes_per_sec : int | str | None
+            Bytes per second, e.g. 52428800 or "50M". None, 0 or "off" remove the limit.
+        direction : str | None
+            "upload", "download", or None for both.
+        """
+        if direction not in (None, "upload", "download"):
+            raise ValueError(f"direction must be 'upload', 'download' or None, got {direction!r}")
+        rate = parse_size(max_bytes_per_sec)
+        for kind, limiter in (("upload", upload_limiter), ("download", download_limiter)):
+            if direction in (None, kind):
+                limiter.set_rate(rate)
+                self.settings[kind].max_bytes_per_sec = rate
+                if rate:
+                    self.logger.info("Bandwidth limit (%s): %s/s", kind, human_size(rate))
+
+    def _build_metadata_index(self) -> MetadataIndex | None:
+        # Index of Drive metadata, stored next to the token file by default
+        cache = self.settings.get("cache") or {}
+        if not cache.get("enabled", True):
+            return None
+        index_file = cache.get("index_file")
+        if not index_file:
+            token_dir = os.path.dirname(self.settings.google_drive.save_token_file or "")
+            index_file = os.path.join(token_dir, "metadata_index.sqlite")
+        try:
+            return MetadataIndex(index_file)
+        except (sqlite3.Error, OSError) as e:
+            # Only a cache: run without it (e.g. unwritable folder, locked database)
+            self.logger.warning("Metadata index %s unavailable, listing from Drive: %s", index_file, e)
+            return None
+
+    def _index_call(self, func, *args):
+        # Call a MetadataIndex method; a database error (e.g. "database is locked" while another
+        # process writes) counts as a cache miss instead of failing the command, and the index is
+        # left alone for a refresh interval instead of waiting for the lock on every call
+        if self._index_failed is not None and time.monotonic() - self._index_failed < self._index_interval():
+            return None
+        try:
+            return func(*args)
+        except sqlite3.Error as e:
+            self._index_failed = time.monotonic()
+            self.logger.warning("Metadata index unavailable, listing from Drive: %s", e)
+            return None
+
+    def _index_interval(self) -> float:
+        return (self.settings.get("cache") or {}).get("refresh_interval", 30)
+
+    # ---------- metadata index ----------
+    def _index_current(self) -> bool:
+        # Whether the metadata index may be read; applies pending Drive changes first
+        # (at most once per settings.cache.refresh_interval seconds)
+        if self.index is None:
+            return False
+        interval = self._index_interval()
+        if self._index_failed is not None and time.monotonic() - self._index_failed < interval:
+            return False
+        with self._index_lock:
+            if self._index_checked is not None and time.monotonic() - self._index_checked < interval:
+                return True
+            try:
+                self._refresh_index()
+            except Exception as e:
+                if isinstance(e, sqlite3.Error):
+                    self._index_failed = time.monotonic()
+                self.logger.warning("Metadata index refresh failed, listing from Drive: %s", e)
+                return False
+            self._index_checked = time.monotonic()
+            return True
+
+    def _refresh_index(self):
+        # Bring the metadata index up to date through the Changes API
+        page_token = self.index.get_meta("page_token")
+        if page_token:
+            try:
+                changes, new_token = self._list_changes(page_token)
+            except HttpError as e:
+                if e.resp.status not in (400, 404):
+                    raise
+                self.logger.warning("Change token of the metadata index is no longer valid, rebuilding it")
+                page_token = None
+            else:
+                for change in changes:
+                    self.index.apply_change(change)
+                self.index.set_meta("page_token", new_token)
+                if changes:
+                    self.logger.info("Metadata index: applied %d change(s)", len(changes))
+        if not page_token:
+            # Empty (or lost) index: start watching changes now, listings fill it later
+            self.index.clear()
+            token = self._execute(self._get_service().changes().getStartPageToken(supportsAllDrives=True))
+            self.index.set_meta("page_token", token["startPageToken"])
+
+    def _mark_index_stale(self):
+        # Our own writes become visible through the Changes API at the next read
+        self._index_checked = None
+
+    def _list_changes(self, page_token: str) -> tuple[list, str]:
+        # All changes since page_token, and the token to continue from next time
+        service = self._get_service()
+        changes = []
+        new_token = page_token
+        while page_token:
+            resp = self._execute(service.changes().list(
+                pageToken=page_token,
+                pageSize=1000,
+                fields=self.CHANGE_FIELDS,
+                includeItemsFromAllDrives=True,
+                supportsAllDrives=True,
+            ))
+            changes.extend(resp.get("changes", []))
+            new_token = resp.get("newStartPageToken", new_token)
+            page_token = resp.get("nextPageToken")
+        return changes, new_token
+
+    # ---------- API calls ----------
+    def _execute(self, request):
+        # Execute an API request under the rate limit, retried by the retry policy
+        def attempt():
+            api_limiter.acquire()
+            return request.execute()
+        return self.retry.call(attempt)
+
+    def _next_chunk(self, request):
+        # Send one chunk of a resumable transfer (upload or MediaIoBaseDownload)
+        def attempt():
+            api_limiter.acquire()
+            return request.next_chunk()
+
+        def resync(error):
+            # After a failed chunk, ask the upload session how many bytes it has before resending
+            if getattr(request, "resumable_uri", None):
+                request._in_error_state = True
+        return self.retry.call(attempt, before_retry=resync)
+
+    # ---------- workers ----------
+    def _get_service(self):
+        # Drive service of the current worker thread (or the main service)
+        return getattr(self._local, "service", self.service)
+
+    def _init_worker(self):
+        # httplib2.Http is not thread-safe, so every worker gets its own client (the pooled one is shared)
+        self._local.service = self._build_service(self.creds, verbose=False)
+
+    @contextmanager
+    def _worker_pool(self, max_workers: int):
+        # ThreadPoolExecutor of workers with their own Drive service; the pooled transport keeps
+        # a connection for every worker (nested pools, e.g. segments, add up)
+        http = self._http
+        if http is not None:
+            http.reserve(max_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers,
+                                    thread_name_prefix="gdrive",
+                                    initializer=self._init_worker) as pool:
+                yield pool
+        finally:
+            if http is not None:
+                http.release(max_workers)
+
+    def _safe_call(self, item, func, *args, **kwargs):
+        # Run func and record its error against item instead of aborting the batch
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            self.logger.error("Failed: %s (%s)", item, e)
+            self.errors.append((item, str(e)))
+            return None
+
+    def _log_errors(self, action: str):
+        if self.errors:
+            self.logger.warning("%s finished with %d error(s):", action, len(self.errors))
+            for item, error in self.errors:
+                self.logger.warning("  %s: %s", item, error)
+
+    def _chunk_tuner(self, kind: str, chunksize) -> ChunkTuner | None:
+        # Tuner for chunksize "auto", bounded by settings.<kind>.chunksize_min / chunksize_max
+        if parse_chunksize(chunksize) != AUTO:
+            return None
+        section = self.settings[kind]
+        return ChunkTuner(section.get("chunksize_min", 256 * 1024),
+                          section.get("chunksize_max", 128 * 1024 * 1024),
+                          multiple=UPLOAD_CHUNK_MULTIPLE if kind == "upload" else 1)
+
     # ---------- public: upload ----------
     def upload(self,
                local_file=None,
                save_file_name=None,
                folder_id=None,
-               chunksize=None) -> list[tuple[str, str]]:
+               chunksize=None,
+               max_workers=None,
+               compress=None,
+               dedup=None) -> list[tuple[str, str]]:
         """
         Upload one or multiple files to Google Drive.
         Parameters
         ----------
-        local_file : str or list[str] or None
+        local_file : str, file-like, or a list (any iterable) of them, or None
             Path or list of paths. If None, use settings.upload.local_file.
+            A binary file-like object (e.g. sys.stdin.buffer) is uploaded as a stream, holding
+            only one chunk in memory; wrap an iterator of bytes in transfer.IterStream.
         save_file_name : str or list[str] or None
-            Name(s) to use on Drive. If None, use local filenames.
+            Name(s) to use on Drive. If None, use local filenames (required for streams).
         folder_id : str or None
             Drive folder ID. If None, upload to root or settings.upload.save_folder_id.
-        chunksize : int or None
+        chunksize : int, "auto" or None
             Chunk size for resumable upload in bytes. If None, use settings.upload.chunksize.
+            "auto" adapts it to the measured throughput and latency of each transfer.
+        max_workers : int or None
+            Number of files uploaded in parallel. If None, use settings.upload.max_workers (default 1).
+        compress : "gzip", "zstd" or None
+            Compress on the fly while uploading (zstd needs the 'zstandard' package). The Drive
+            name gets a ".gz" / ".zst" suffix and appProperties record the codec and original
+            size, so download() and download2() decompress transparently.
+            If None, use settings.upload.compress (default None, no compression).
+        dedup : "skip", "copy" or None
+            Compare the MD5 and size of every file with the files already in the target folder.
+            "skip": a file whose content is already there is not uploaded.
+            "copy": it is not uploaded either, but copied server-side under its new name
+            (unless a file of that name already has the content).
+            If None, use settings.upload.dedup (default None, always upload).
+            Cannot be combined with compress (Drive only knows the MD5 of the compressed file).
             
         Returns 
         -------
         List of (local_path, file_id)
+            file_id is None for files that failed; the errors are collected in self.errors.
+            Files matched by dedup are listed in self.duplicates as {local_path: existing file_id}.
         """
         # Defaults from settings
         if local_file is None:
@@ -358,15 +750,32 @@ class GoogleDriveTools:
             save_file_name = self.settings.upload.save_file_name
         if chunksize is None:
             chunksize = self.settings.upload.chunksize
+        if max_workers is None:
+            max_workers = self.settings.upload.get("max_workers", 1)
+        if compress is None:
+            compress = self.settings.upload.get("compress")
+        if compress:
+            compressor(compress)  # fail early on an unknown codec or a missing zstandard
+        if dedup is None:
+            dedup = self.settings.upload.get("dedup")
+        if dedup not in (None, "skip", "copy"):
+            raise ValueError(f"dedup must be None, 'skip' or 'copy', got {dedup!r}")
+        if dedup and compress:
+            raise ValueError("dedup cannot be combined with compress: "
+                             "Drive only knows the MD5 of the compressed content.")
 
         # Normalize to list (local_file)
         if isinstance(local_file, (str, os.PathLike)):
             local_files_list = [str(local_file)]
+        elif is_stream(local_file):
+            local_files_list = [local_file]
         else:
             local_files_list = list(local_file)
 
         # Normalize to list (save_file_name)
         if save_file_name is None:
+            if any(is_stream(f) for f in local_files_list):
+                raise ValueError("save_file_name must be given when uploading a stream.")
             save_names_list =  [os.path.basename(f) for f in local_files_list]
         elif isinstance(save_file_name, (str, os.PathLike)):
             save_names_list = [str(save_file_name)]
@@ -379,57 +788,202 @@ class GoogleDriveTools:
             raise ValueError("save_file_name must be None, or a list of the same length as local_file.")
         # Check local files exist
         for local_file in local_files_list:
-            if not os.path.exists(local_file):
+            if not is_stream(local_file) and not os.path.exists(local_file):
                 raise FileNotFoundError(f"Local file not found: {local_file}")
 
+        # Content already in the target folder, by size; one listing for all files
+        existing = {}
+        if dedup:
+            for row in self._list_children(folder_id or "root"):
+                if row[4] is not None and row[3] is not None:
+                    existing.setdefault(int(row[3]), []).append(row)
+
         # Upload files
-        results = []
-        for n in range(len(local_files_list)):
+        self.errors = []
+        self.duplicates = {}
+        def put(item, save_name):
+            if existing and not is_stream(item):
+                file_id = self._dedup_single(item, save_name, folder_id, existing, dedup)
+                if file_id is not None:
+                    return file_id
+            return self._upload_single(item, save_name, folder_id, chunksize=chunksize, compress=compress)
+        def upload_one(n):
             self.logger.info("Upload Progress: [ %d / %d ]", n+1, len(local_files_list))
-            local_file = local_files_list[n]
-            save_file_name = save_names_list[n]
-            file_id = self._upload_single(local_file, save_file_name, folder_id, chunksize=chunksize)
-            results.append((local_file, file_id))
+            item = local_files_list[n]
+            return self._safe_call(stream_name(item) if is_stream(item) else item, put,
+                                   item, save_names_list[n])
+        if max_workers > 1:
+            with self._worker_pool(max_workers) as pool:
+                file_ids = list(pool.map(upload_one, range(len(local_files_list))))
+        else:
+            file_ids = [upload_one(n) for n in range(len(local_files_list))]
+        results = list(zip(local_files_list, file_ids))
+        self._log_errors("Upload")
         return results
 
+    def _dedup_single(self, local_file: str, save_file_name: str, folder_id: str | None,
+                      existing: dict, mode: str) -> str | None:
+        # Reuse a remote file with the same content instead of uploading; None if there is none.
+        # The local file is only hashed when a remote file has its size.
+        rows = existing.get(os.path.getsize(local_file))
+        if not rows:
+            return None
+        md5 = file_md5(local_file)
+        rows = [row for row in rows if row[4] == md5]
+        if not rows:
+            return None
+        same_name = [row for row in rows if row[1] == save_file_name]
+        match = (same_name or rows)[0]
+        self.duplicates[local_file] = match[0]
+        if mode == "skip" or same_name:
+            self.logger.info("Skipped %s: same content as %s (ID: %s)", local_file, match[1], match[0])
+            return match[0]
+        body = {"name": save_file_name}
+        if folder_id:
+            body["parents"] = [folder_id]
+        copy = self._execute(self._get_service().files().copy(fileId=match[0], body=body, fields="id",
+                                                              supportsAllDrives=True))
+        self._mark_index_stale()
+        self.logger.info("Copied %s on Drive from %s (ID: %s) -> ID: %s",
+                         local_file, match[1], match[0], copy["id"])
+        return copy["id"]
+
     def _upload_single(self, 
-                       local_file: str,
+                       local_file,
                        save_file_name: str | None,
                        folder_id: str | None,
-                       chunksize=1024*1024*100) -> str:
+                       chunksize=1024*1024*100,
+                       file_id: str | None = None,
+                       compress: str | None = None,
+                       response_meta: dict | None = None) -> str:
+        # file_id: update the content of this existing Drive file instead of creating a new one
+        # response_meta: if given, filled with the id and md5Checksum of the uploaded file
+        # local_file: path, or a binary file-like object (stream) of unknown size
+        # compress: "gzip" | "zstd" to compress on the fly (tagged in appProperties for download)
+        streaming = is_stream(local_file)
         # If local_file exists
-        if not os.path.exists(local_file):
+        if not streaming and not os.path.exists(local_file):
             raise FileNotFoundError(f"Local file not found: {local_file}")
         # Prepare save file
         if save_file_name is None:
+            if streaming:
+                raise ValueError("save_file_name must be given when uploading a stream.")
             save_file_name = os.path.basename(local_file)
         file_metadata = {"name": save_file_name}
         if folder_id:
             file_metadata["parents"] = [folder_id]
         
+        # Compressed uploads stream the output of a background compressor
+        reader = None
+        if compress:
+            reader = CompressedReader(local_file, compress)
+            file_metadata["name"] = save_file_name = save_file_name + CODECS[compress]
+            file_metadata["appProperties"] = {APP_CODEC: compress}
+            if not streaming:
+                file_metadata["appProperties"][APP_SIZE] = str(os.path.getsize(local_file))
+            local_file, streaming = reader, True
+
         # Upload file
-        media = MediaFileUpload(local_file, resumable=True, chunksize=int(chunksize))
-        file_size_bytes = os.path.getsize(local_file)
+        # Small files go in one multipart request instead of a resumable session plus its chunk(s)
+        file_size_bytes = None if streaming else os.path.getsize(local_file)
+        simple = file_size_bytes is not None and file_size_bytes <= self.settings.upload.get(
+            "simple_upload_max_bytes", 5 * 1024 * 1024)
+        tuner = None if simple else self._chunk_tuner("upload", chunksize)
+        if streaming:
+            media = StreamUpload(local_file, mimetype=CODEC_MIMETYPES.get(compress, "application/octet-stream"),
+                                 chunksize=tuner.chunksize if tuner else int(chunksize))
+            local_file = stream_name(local_file)
+        elif simple:
+            media = MediaFileUpload(local_file, resumable=False)
+        else:
+            media = MediaFileUpload(local_file, resumable=True,
+                                    chunksize=tuner.chunksize if tuner else int(chunksize))
         self.logger.info("Uploading %s -> %s ...", local_file, save_file_name)
-        request = self.service.files().create(
-            body=file_metadata,
-            media_body=media,
-            supportsTeamDrives=True,
-            fields="id",
-        )
-        response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                uploaded = int(status.progress() * file_size_bytes)
-                self.logger.info(
-                    "Uploading file: %.2f%% (%s / %s)",
-                    status.progress() * 100,
-                    human_size(uploaded),
-                    human_size(file_size_bytes),
-                )
-        self.logger.info("Uploading file: 100.00%% (%s / %s)", human_size(file_size_bytes), human_size(file_size_bytes))
+        if file_id is None:
+            request = self._get_service().files().create(
+                body=file_metadata,
+                media_body=media,
+                supportsTeamDrives=True,
+                fields="id,md5Checksum",
+            )
+        else:
+            request = self._get_service().files().update(
+                fileId=file_id,
+                media_body=media,
+                supportsAllDrives=True,
+                fields="id,md5Checksum",
+                **({"body": {"appProperties": file_metadata["appProperties"]}} if compress else {}),
+            )
+        # Continue a session left behind by an interrupted run (a stream cannot be replayed)
+        journal = None if streaming or simple else self.journal
+        if journal is not None:
+            key, info = journal.fingerprint(local_file, save_file_name, file_id or folder_id)
+            session = journal.get(key)
+            if session:
+                self.logger.info("Resuming upload session of %s (last acknowledged: %s)",
+                                 local_file, human_size(session["offset"]))
+                request.resumable_uri = session["uri"]
+                # In error state, next_chunk first asks the server how many bytes it has
+                request._in_error_state = True
+        try:
+            if simple:
+                upload_limiter.acquire(file_size_bytes)
+            response = self._execute(request) if simple else None
+            while response is None:
+                try:
+                    sent = request.resumable_progress
+                    upload_limiter.acquire(media.chunksize())
+                    if tuner:
+                        tuner.start()
+                    status, response = self._next_chunk(request)
+                    if tuner and response is None:
+                        media._chunksize = tuner.update(request.resumable_progress - sent)
+                except HttpError as e:
+                    if journal is not None and session and e.resp.status in (404, 410):
+                        # The saved session expired on the server: start from byte zero
+                        self.logger.warning("Upload session expired, restarting %s", local_file)
+                        journal.remove(key)
+                        session = None
+                        request.resumable_uri = None
+                        request.resumable_progress = 0
+                        request._in_error_state = False
+                        continue
+                    raise
+                if journal is not None and response is None and request.resumable_uri:
+                    journal.put(key, info, request.resumable_uri, request.resumable_progress)
+                if status and file_size_bytes is None:
+                    self.logger.info("Uploading stream: %s", human_size(status.resumable_progress))
+                elif status:
+                    uploaded = int(status.progress() * file_size_bytes)
+                    self.logger.info(
+                        "Uploading file: %.2f%% (%s / %s)",
+                        status.progress() * 100,
+                        human_size(uploaded),
+                        human_size(file_size_bytes),
+                    )
+        finally:
+            if reader is not None:
+                reader.close()
+        if file_size_bytes is None:
+            self.logger.info("Uploading stream: done")
+        else:
+            self.logger.info("Uploading file: 100.00%% (%s / %s)", human_size(file_size_bytes), human_size(file_size_bytes))
+        if journal is not None:
+            journal.remove(key)
+        if tuner:
+            self.logger.info("Auto chunksize for %s: %s", local_file, tuner.describe())
         file_id = response.get("id")
+        if response_meta is not None:
+            response_meta.update(response)
+        if reader is not None:
+            self.logger.info("Compressed %s -> %s (%s)", human_size(reader.bytes_in),
+                             human_size(reader.bytes_out), compress)
+            if APP_SIZE not in file_metadata["appProperties"]:
+                # The size of a stream is only known now
+                self._execute(self._get_service().files().update(
+                    fileId=file_id, body={"appProperties": {APP_CODEC: compress, APP_SIZE: str(reader.bytes_in)}},
+                    supportsAllDrives=True, fields="id"))
+        self._mark_index_stale()
         self.logger.info("Upload finished. File Id=%s", file_id)
         return file_id
 
@@ -437,7 +991,9 @@ class GoogleDriveTools:
     def download(self,
                  file_id: str | list[str] | None = None,
                  save_local_dir: str | None = None,
-                 chunksize=None) -> list[str]:
+                 chunksize=None,
+                 max_workers=None,
+                 segments=None) -> list[str]:
         """
         Download one or multiple files from Google Drive.
 
@@ -447,13 +1003,18 @@ class GoogleDriveTools:
             One file ID or a list of file IDs. If None, use settings.download.file_id.
         save_local_dir : str or list[str] or None
             Local directory to save file(s). If None, use settings.download.save_local_dir.
-        chunksize : int or None
+        chunksize : int, "auto" or None
             Chunk size for resumable download in bytes. If None, use settings.download.chunksize.
+            "auto" adapts it to the measured throughput and latency of each transfer.
+        max_workers : int or None
+            Number of files downloaded in parallel. If None, use settings.download.max_workers (default 1).
+        segments : int or None
+            Number of parallel byte-range connections per large file. If None, use settings.download.segments (default 1).
 
         Returns
         -------
         list[str]
-            A list of local file paths of the downloaded files.
+            A list of local file paths of the downloaded files (None for failed files).
         """
         # Defaults from settings
         if file_id is None:
@@ -465,6 +1026,8 @@ class GoogleDriveTools:
             save_local_dir = self.settings.download.save_local_dir
         if chunksize is None:
             chunksize = self.settings.download.chunksize
+        if max_workers is None:
+            max_workers = self.settings.download.get("max_workers", 1)
 
         # Normalize file_id to list
         if isinstance(file_id, str):
@@ -478,31 +1041,137 @@ class GoogleDriveTools:
             os.makedirs(save_local_dir, exist_ok=True)
 
         # Download files
-        results = []
-        for n in range(len(file_id_list)):
+        self.errors = []
+        metas, meta_errors = self._get_many(file_id_list, self.DOWNLOAD_FIELDS)
+        def download_one(n):
             self.logger.info("Download Progress: [ %d / %d ]", n+1, len(file_id_list))
             file_id = file_id_list[n]
-            local_path = self._download_single(file_id, save_local_dir, chunksize=int(chunksize))
-            results.append(local_path)
+            if file_id in meta_errors:
+                self.logger.error("Failed to get metadata for file_id=%s: %s", file_id, meta_errors[file_id])
+                self.errors.append((file_id, str(meta_errors[file_id])))
+                return None
+            return self._download_single(file_id, save_local_dir, chunksize=chunksize, segments=segments,
+                                         meta=metas[file_id])
+        if max_workers > 1:
+            with self._worker_pool(max_workers) as pool:
+                results = list(pool.map(download_one, range(len(file_id_list))))
+        else:
+            results = [download_one(n) for n in range(len(file_id_list))]
+        self._log_errors("Download")
         return results
+
+    def download_stream(self, file_id: str, chunksize=None, decompress: bool = True):
+        """
+        Stream the content of a Google Drive file, without writing it to disk.
+
+        Parameters
+        ----------
+        file_id : str
+            Google Drive file ID.
+        chunksize : int, "auto" or None
+            Bytes fetched per request. If None, use settings.download.chunksize.
+            Memory use is bounded by one chunk. A failed request is retried
+            (see settings.api) from the last byte received.
+        decompress : bool
+            Whether to decompress files uploaded with compress="gzip" / "zstd".
+
+        Returns
+        -------
+        Iterator[bytes]
+            The content of the file, chunk by chunk.
+        """
+        if chunksize is None:
+            chunksize = self.settings.download.chunksize
+        # Metadata first, so a missing file fails here and not at the first chunk
+        meta = self._execute(self._get_service().files().get(fileId=file_id, fields=self.DOWNLOAD_FIELDS,
+                                                             supportsAllDrives=True))
+        file_size_bytes = int(meta.get("size") or 0)
+        self.logger.info("Streaming %s (id=%s, %s) ...", meta.get("name", file_id), file_id,
+                         human_size(file_size_bytes))
+        chunks = self._iter_range(file_id, file_size_bytes, chunksize)
+        codec = compressed_codec(meta)
+        if decompress and codec:
+            return self._iter_decompressed(chunks, codec)
+        return chunks
+
+    @staticmethod
+    def _iter_decompressed(chunks, codec: str):
+        dec = decompressor(codec)
+        for data in chunks:
+            out = dec.decompress(data)
+            if out:
+                yield out
+        tail = dec.flush() if hasattr(dec, "flush") else b""
+        if tail:
+            yield tail
+
+    def download_to(self, file_id: str, fileobj, chunksize=None) -> int:
+        """
+        Download a Google Drive file into a writable binary object (e.g. sys.stdout.buffer).
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+        """
+        written = 0
+        for data in self.download_stream(file_id, chunksize=chunksize):
+            fileobj.write(data)
+            written += len(data)
+        if hasattr(fileobj, "flush"):
+            fileobj.flush()
+        self.logger.info("Streaming finished: %s (%s)", file_id, human_size(written))
+        return written
+
+    def _iter_range(self, file_id: str, file_size_bytes: int, chunksize):
+        # Yield the file chunk by chunk with ranged requests
+        tuner = self._chunk_tuner("download", chunksize)
+        size = tuner.chunksize if tuner else int(chunksize)
+        offset = 0
+        while offset < file_size_bytes:
+            if tuner:
+                tuner.start()
+            data = self._get_range(file_id, offset, min(offset + size, file_size_bytes) - 1)
+            if tuner:
+                size = tuner.update(len(data))
+            offset += len(data)
+            yield data
+        if tuner:
+            self.logger.info("Auto chunksize for %s: %s", file_id, tuner.describe())
     
+    @staticmethod
+    def _local_name(meta: dict) -> str:
+        # Local file name of a Drive file: files uploaded with compression are decompressed on the
+        # fly, under their original name
+        file_name = meta.get("name", meta.get("id"))
+        codec = compressed_codec(meta)
+        if codec and file_name.endswith(CODECS[codec]):
+            file_name = file_name[:-len(CODECS[codec])]
+        return file_name
+
     def _download_single(self,
                          file_id: str,
                          save_local_dir: str | None = None,
-                         chunksize=1024*1024*100) -> str:
-        # Check file exists on Drive 
-        try:
-            meta = self.service.files().get(fileId=file_id, fields="name,size").execute()
-        except Exception as e:
-            self.logger.error("Failed to get metadata for file_id=%s: %s", file_id, e)
-            return None
+                         chunksize=1024*1024*100,
+                         segments=None,
+                         meta=None) -> str:
+        # Check file exists on Drive (unless the caller already fetched its metadata)
+        if meta is None:
+            try:
+                meta = self._execute(self._get_service().files().get(fileId=file_id, fields=self.DOWNLOAD_FIELDS))
+            except Exception as e:
+                self.logger.error("Failed to get metadata for file_id=%s: %s", file_id, e)
+                self.errors.append((file_id, str(e)))
+                return None
 
         if not meta:
             self.logger.error("File ID %s not found on Google Drive.", file_id)
+            self.errors.append((file_id, "not found"))
             return None
         
         # Prepare 
-        file_name = meta.get("name", file_id)
+        file_name = self._local_name(meta)
+        codec = compressed_codec(meta)
         size_str = meta.get("size")
         file_size_bytes = int(size_str) if size_str is not None else 0
         if save_local_dir is None:
@@ -510,38 +1179,210 @@ class GoogleDriveTools:
         local_path = os.path.join(save_local_dir, file_name)
         self.logger.info("Downloading %s <- %s (id=%s) ...",
                          local_path, file_name, file_id)
+        if segments is None:
+            segments = self.settings.download.get("segments", 1)
+        segment_min_size = self.settings.download.get("segment_min_size", 1024*1024*100)
+        # Resumable downloads go to a tagged .part file that is renamed into place when complete
+        resume = self.settings.download.get("resume", True)
+        part_path = local_path + ".part" if resume else local_path
         # Download file
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            with io.FileIO(local_path, "wb") as fh:
-                downloader = MediaIoBaseDownload(fh, request, chunksize=chunksize)
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                    if status is not None:
-                        downloaded = int(status.progress() * file_size_bytes)
-                        if file_size_bytes > 0:
-                            self.logger.info(
-                                "Downloading file: %.2f%% (%s / %s)",
-                                status.progress() * 100, 
-                                human_size(downloaded),
-                                human_size(file_size_bytes))
-                        else:
-                            self.logger.info(
-                                "Downloading file: %.2f%%",
-                                status.progress() * 100)
+            if codec:
+                # Decompressed output does not map to byte ranges, so it is neither resumed nor segmented
+                remove_part_tag(part_path)
+                with open(part_path, "wb") as fh:
+                    for data in self._iter_decompressed(
+                            self._iter_range(file_id, file_size_bytes, chunksize), codec):
+                        fh.write(data)
+                self.logger.info("Decompressed %s (%s): %s -> %s", local_path, codec,
+                                 human_size(file_size_bytes), human_size(os.path.getsize(part_path)))
+            elif segments > 1 and file_size_bytes >= max(segment_min_size, 1):
+                # Segments leave holes in the file, so a segmented .part is never resumed
+                remove_part_tag(part_path)
+                self._download_segmented(file_id, part_path, file_size_bytes, segments, chunksize=chunksize)
+            else:
+                offset = 0
+                if resume:
+                    tag = {"file_id": file_id,
+                           "md5Checksum": meta.get("md5Checksum"),
+                           "modifiedTime": meta.get("modifiedTime"),
+                           "size": size_str}
+                    if (os.path.exists(part_path) and load_part_tag(part_path) == tag
+                            and os.path.getsize(part_path) <= file_size_bytes):
+                        offset = os.path.getsize(part_path)
+                        self.logger.info("Resuming download of %s from %s", local_path, human_size(offset))
+                    else:
+                        # No partial data, or the remote file changed since: start over
+                        open(part_path, "wb").close()
+                        save_part_tag(part_path, tag)
+                if offset < file_size_bytes or file_size_bytes == 0:
+                    self._download_stream(file_id, part_path, file_size_bytes, offset=offset, chunksize=chunksize)
+            if resume:
+                os.replace(part_path, local_path)
+                remove_part_tag(part_path)
         except Exception as e:
             self.logger.error("Download failed for file_id=%s: %s", file_id, e)
-            # If download fails, it may leave an incomplete/empty file, which can be optionally removed
+            self.errors.append((file_id, str(e)))
+            # An empty (or untagged) partial file is useless; a tagged .part file is kept for the next run
             try:
-                if os.path.exists(local_path) and os.path.getsize(local_path) == 0:
-                    os.remove(local_path)
+                if os.path.exists(part_path) and (
+                        os.path.getsize(part_path) == 0 or (resume and load_part_tag(part_path) is None)):
+                    os.remove(part_path)
+                    remove_part_tag(part_path)
             except Exception:
                 pass
             return None
         self.logger.info("Download finished: %s", local_path)
         return local_path
+
+    def _download_stream(self,
+                         file_id: str,
+                         local_path: str,
+                         file_size_bytes: int,
+                         offset: int = 0,
+                         chunksize=1024*1024*100):
+        # Download one file over a single connection, appending from offset
+        request = self._get_service().files().get_media(fileId=file_id)
+        tuner = self._chunk_tuner("download", chunksize)
+        with io.FileIO(local_path, "ab" if offset else "wb") as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=tuner.chunksize if tuner else int(chunksize))
+            # MediaIoBaseDownload asks for the range starting at its progress
+            downloader._progress = offset
+            done = False
+            while not done:
+                received = downloader._progress
+                download_limiter.acquire(downloader._chunksize)
+                if tuner:
+                    tuner.start()
+                status, done = self._next_chunk(downloader)
+                if tuner and not done:
+                    downloader._chunksize = tuner.update(downloader._progress - received)
+                if status is not None:
+                    downloaded = int(status.progress() * file_size_bytes)
+                    if file_size_bytes > 0:
+                        self.logger.info(
+                            "Downloading file: %.2f%% (%s / %s)",
+                            status.progress() * 100, 
+                            human_size(downloaded),
+                            human_size(file_size_bytes))
+                    else:
+                        self.logger.info(
+                            "Downloading file: %.2f%%",
+                            status.progress() * 100)
+        if tuner:
+            self.logger.info("Auto chunksize for %s: %s", local_path, tuner.describe())
+
+    def _download_segmented(self,
+                            file_id: str,
+                            local_path: str,
+                            file_size_bytes: int,
+                            segments: int,
+                            chunksize=1024*1024*100):
+        # Download one file over several connections, each fetching its own byte range
+        # ---------- step 1. preallocate the target file ----------
+        with open(local_path, "wb") as fh:
+            fh.truncate(file_size_bytes)
+        seg_size = -(-file_size_bytes // segments)
+        bounds = [(start, min(start + seg_size, file_size_bytes) - 1)
+                  for start in range(0, file_size_bytes, seg_size)]
+        self.logger.info("Segmented download: %d segments of %s", len(bounds), human_size(seg_size))
+
+        # ---------- step 2. fetch segments in parallel, writing each at its offset ----------
+        lock = threading.Lock()
+        downloaded = [0]
+
+        def fetch(start, end):
+            # A failed request is retried on its own, from the last byte written
+            offset = start
+            tuner = self._chunk_tuner("download", chunksize)
+            size = tuner.chunksize if tuner else int(chunksize)
+            with open(local_path, "r+b") as fh:
+                while offset <= end:
+                    if tuner:
+                        tuner.start()
+                    data = self._get_range(file_id, offset, min(offset + size, end + 1) - 1)
+                    if tuner:
+                        size = tuner.update(len(data))
+                    fh.seek(offset)
+                    fh.write(data)
+                    offset += len(data)
+                    with lock:
+                        downloaded[0] += len(data)
+                        self.logger.info("Downloading file: %.2f%% (%s / %s)",
+                                         downloaded[0] / file_size_bytes * 100,
+                                         human_size(downloaded[0]),
+                                         human_size(file_size_bytes))
+
+        with self._worker_pool(len(bounds)) as pool:
+            futures = [pool.submit(fetch, start, end) for start, end in bounds]
+        for future in futures:
+            future.result()
+
+    def _get_range(self, file_id: str, start: int, end: int) -> bytes:
+        # Fetch bytes [start, end] of a file with a single ranged get_media request
+        request = self._get_service().files().get_media(fileId=file_id)
+        headers = dict(request.headers)
+        headers["range"] = f"bytes={start}-{end}"
+        download_limiter.acquire(end - start + 1)
+
+        def attempt():
+            api_limiter.acquire()
+            resp, content = request.http.request(request.uri, method="GET", headers=headers)
+            if resp.status == 200 and start == 0:
+                # Range ignored by the server: keep only the requested part
+                content = content[:end - start + 1]
+            elif resp.status != 206:
+                raise HttpError(resp, content, uri=request.uri)
+            if not content:
+                raise TransientError(f"Empty response for bytes {start}-{end} of file_id={file_id}")
+            return content
+        return self.retry.call(attempt)
     
+    def _execute_batch(self, requests: list) -> list[tuple[dict | None, Exception | None]]:
+        # Execute API requests as Drive HTTP batches; returns (response, exception) per request.
+        # Calls that failed with a retryable error (e.g. rate limits) are sent again in a new batch
+        results = [(None, None)] * len(requests)
+        def callback(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+        service = self._get_service()
+        pending = list(range(len(requests)))
+        attempt = 0
+        while pending:
+            for start in range(0, len(pending), self.BATCH_SIZE):
+                chunk = pending[start:start + self.BATCH_SIZE]
+                batch = service.new_batch_http_request(callback=callback)
+                for n in chunk:
+                    batch.add(requests[n], request_id=str(n))
+                # Drive counts every call of a batch against the quota
+                api_limiter.acquire(len(chunk))
+                self.retry.call(batch.execute)
+            failed = [(n, self.retry.classify(results[n][1])) for n in pending if results[n][1] is not None]
+            failed = [(n, retry_after) for n, (retryable, retry_after) in failed if retryable]
+            if not failed or attempt >= self.retry.max_retries:
+                break
+            retry_after = max((r for _, r in failed if r is not None), default=None)
+            wait = self.retry.delay(attempt, retry_after)
+            attempt += 1
+            self.logger.warning("Batch: %d call(s) failed, retry %d/%d in %.1fs",
+                                len(failed), attempt, self.retry.max_retries, wait)
+            time.sleep(wait)
+            pending = [n for n, _ in failed]
+        return results
+
+    def _get_many(self, file_ids, fields: str) -> tuple[dict, dict]:
+        # Batched files.get for many IDs; returns ({id: metadata}, {id: exception})
+        file_ids = list(dict.fromkeys(file_ids))
+        service = self._get_service()
+        requests = [service.files().get(fileId=file_id, fields=fields, supportsAllDrives=True)
+                    for file_id in file_ids]
+        metas, errors = {}, {}
+        for file_id, (meta, error) in zip(file_ids, self._execute_batch(requests)):
+            if error is not None or not meta:
+                errors[file_id] = error if error is not None else "not found"
+            else:
+                metas[file_id] = meta
+        return metas, errors
+
     def create_folder(self,
                       folder_name: str,
                       parent_folder_id: str | None = None) -> str:
@@ -562,43 +1403,85 @@ class GoogleDriveTools:
         """
         file_metadata = {
             "name": folder_name,
-            "mimeType": "application/vnd.google-apps.folder"
+            "mimeType": self.FOLDER_MIME
         }
         if parent_folder_id:
             file_metadata["parents"] = [parent_folder_id]
 
-        folder = self.service.files().create(
+        folder = self._execute(self.service.files().create(
             body=file_metadata,
             fields="id"
-        ).execute()
+        ))
         folder_id = folder.get("id")
+        self._mark_index_stale()
         self.logger.info("Folder created: %s (ID: %s)", folder_name, folder_id)
         return folder_id
     
-    def _check_local_files(self, file_list, check_info=None):
-        # Check local files exist
+    def _create_folder_tree(self, manifest, folder_id: str | None) -> dict:
+        # Create the remote copy of every local folder in the manifest, level by level,
+        # with one batch request per (up to) BATCH_SIZE folders; returns {local path: folder ID}
+        folder_ids = {None: folder_id}
+        level = [entry for entry in manifest if entry.is_dir and entry.parent is None]
+        depth = 0
+        while level:
+            self.logger.info("Creating %d folder(s) at depth %d ...", len(level), depth)
+            service = self._get_service()
+            requests = []
+            for entry in level:
+                file_metadata = {
+                    "name": os.path.basename(os.path.normpath(entry.path)),
+                    "mimeType": self.FOLDER_MIME,
+                }
+                if folder_ids[entry.parent]:
+                    file_metadata["parents"] = [folder_ids[entry.parent]]
+                requests.append(service.files().create(body=file_metadata, fields="id", supportsAllDrives=True))
+            failures = []
+            self._mark_index_stale()
+            for entry, (folder, error) in zip(level, self._execute_batch(requests)):
+                if error is not None:
+                    self.logger.error("Failed to create folder for %s: %s", entry.path, error)
+                    failures.append(error)
+                else:
+                    folder_ids[entry.path] = folder["id"]
+                    self.logger.info("Folder created: %s (ID: %s)", entry.path, folder["id"])
+            if failures:
+                raise failures[0]
+            level_paths = {entry.path for entry in level}
+            level = [entry for entry in manifest if entry.is_dir and entry.parent in level_paths]
+            depth += 1
+        return folder_ids
+
+    def _check_local_files(self, file_list, check_info=None, manifest=None):
+        # Check local files exist (count and size from the local manifest)
+        if manifest is None:
+            manifest = scan_local(file_list)
         info = {"File_num": 0, "Folder_num": 0, "Total_size": 0}
-        for local_file in file_list:
-            if not os.path.exists(local_file):
-                raise FileNotFoundError(f"Local file not found: {local_file}")
-            if os.path.isfile(local_file):
-                info["File_num"] += 1
-                info["Total_size"] += os.path.getsize(local_file)
-            elif os.path.isdir(local_file):
+        for entry in manifest:
+            if entry.is_dir:
                 info["Folder_num"] += 1
-                sub_files_list = [os.path.join(local_file, f) for f in os.listdir(local_file)]
-                sub_info = self._check_local_files(sub_files_list)
-                info["File_num"] += sub_info["File_num"]
-                info["Folder_num"] += sub_info["Folder_num"]
-                info["Total_size"] += sub_info["Total_size"]
+            else:
+                info["File_num"] += 1
+                info["Total_size"] += entry.size
         if check_info is not None:
             check_info.update(info)
         else:
             check_info = info
         return check_info
+
+    @staticmethod
+    def _manifest_tree(manifest) -> dict:
+        # {parent path: [LocalEntry, ...]}; roots are stored under None
+        tree = {}
+        for entry in manifest:
+            tree.setdefault(entry.parent, []).append(entry)
+        return tree
     
-    
-    def _upload_files(self, local_file_list, folder_id, folder_name=None, chunksize=None, upload_results=None):
+    def _upload_files(self, local_file_list, folder_id, folder_name=None, chunksize=None, upload_results=None, pool=None,
+                      tree=None, folder_ids=None):
+        # local_file_list: paths (top-level call) or manifest entries of the tree (recursive calls)
+        if tree is None:
+            tree = self._manifest_tree(scan_local(local_file_list))
+            local_file_list = tree.get(None, [])
         # Defaults from settings
         if chunksize is None:
             chunksize = self.settings.upload.chunksize
@@ -607,7 +1490,7 @@ class GoogleDriveTools:
                 folder_name = "root"
             else:
                 try:
-                    meta = self.service.files().get(fileId=folder_id, fields="name").execute()
+                    meta = self._execute(self.service.files().get(fileId=folder_id, fields="name"))
                     folder_name = meta.get("name", folder_id)
                 except Exception:
                     folder_name = None
@@ -615,29 +1498,42 @@ class GoogleDriveTools:
             upload_results = {"folder_id": folder_id, 'folder_name': folder_name, "content": []}
 
         # Upload files
-        for local_file in local_file_list:
-            if not os.path.exists(local_file):
-                raise FileNotFoundError(f"Local file not found: {local_file}")
-            if os.path.isfile(local_file):
+        for local_entry in local_file_list:
+            local_file = local_entry.path
+            if not local_entry.is_dir:
                 file_name = os.path.basename(local_file)
-                file_id = self._upload_single(local_file, file_name, folder_id, chunksize=chunksize)
-                upload_results['content'].append({"file_name": os.path.basename(local_file), "file_id": file_id})
-            elif os.path.isdir(local_file):
-                folder_name = os.path.basename(local_file)
-                new_folder_id = self.create_folder(folder_name, parent_folder_id=folder_id)
-                sub_files_list = [os.path.join(local_file, f) for f in os.listdir(local_file)]
-                sub_upload_results = self._upload_files(sub_files_list, new_folder_id, folder_name=folder_name, chunksize=chunksize)
+                entry = {"file_name": file_name, "file_id": None}
+                upload_results['content'].append(entry)
+                if pool is None:
+                    entry["file_id"] = self._safe_call(local_file, self._upload_single,
+                                                       local_file, file_name, folder_id, chunksize=chunksize)
+                else:
+                    # Keep walking while workers upload; the entry is filled in when done
+                    future = pool.submit(self._safe_call, local_file, self._upload_single,
+                                         local_file, file_name, folder_id, chunksize=chunksize)
+                    future.add_done_callback(lambda f, entry=entry: entry.update(file_id=f.result()))
+            else:
+                folder_name = os.path.basename(os.path.normpath(local_file))
+                if folder_ids is not None:
+                    new_folder_id = folder_ids[local_file]
+                else:
+                    new_folder_id = self.create_folder(folder_name, parent_folder_id=folder_id)
+                sub_upload_results = self._upload_files(tree.get(local_file, []), new_folder_id, folder_name=folder_name,
+                                                        chunksize=chunksize, pool=pool, tree=tree,
+                                                        folder_ids=folder_ids)
                 upload_results['content'].append(sub_upload_results)
         return upload_results
     
     def upload2(self,
                 local_file=None,
                 folder_id=None,
-                chunksize=None) -> list[tuple[str, str]]:
+                chunksize=None,
+                max_workers=None) -> list[tuple[str, str]]:
         """
         upload files or folders to google drive
         
         :param self: 说明
+        :param max_workers: number of files uploaded in parallel (default settings.upload.max_workers)
         """
         # Defaults from settings
         if local_file is None:
@@ -646,6 +1542,8 @@ class GoogleDriveTools:
             folder_id = self.settings.upload.save_folder_id
         if chunksize is None:
             chunksize = self.settings.upload.chunksize
+        if max_workers is None:
+            max_workers = self.settings.upload.get("max_workers", 1)
 
         # Normalize to list (local_file)
         if isinstance(local_file, (str, os.PathLike)):
@@ -653,39 +1551,271 @@ class GoogleDriveTools:
         else:
             local_file_list = list(local_file)
         
-        # Check
-        check_info = self._check_local_files(local_file_list)
+        # Check (one local scan shared by the check and the upload)
+        manifest = scan_local(local_file_list)
+        tree = self._manifest_tree(manifest)
+        check_info = self._check_local_files(local_file_list, manifest=manifest)
         self.logger.info("Total need to upload: %d files, %d folders, ( %s )",
                          check_info["File_num"], check_info["Folder_num"],
                          human_size(check_info["Total_size"]))
             
+        # Create the whole folder hierarchy first, then upload into it
+        folder_ids = self._create_folder_tree(manifest, folder_id)
+
         # Upload
-        upload_results = self._upload_files(local_file_list, folder_id, chunksize=chunksize)
+        self.errors = []
+        if max_workers > 1:
+            with self._worker_pool(max_workers) as pool:
+                upload_results = self._upload_files(tree.get(None, []), folder_id, chunksize=chunksize, pool=pool,
+                                                    tree=tree, folder_ids=folder_ids)
+        else:
+            upload_results = self._upload_files(tree.get(None, []), folder_id, chunksize=chunksize,
+                                                tree=tree, folder_ids=folder_ids)
+        self._log_errors("Upload")
         return upload_results
     
-    def _check_remote_files(self, file_id_list, check_info=None):
-        # Check remote files exist
+    # ---------- public: sync ----------
+    def sync_up(self,
+                local_dir: str,
+                folder_id: str | None = None,
+                chunksize=None,
+                delete: bool | None = None,
+                max_workers=None) -> dict:
+        """
+        Incrementally upload the content of a local folder into a Drive folder.
+
+        Files are matched by name within each folder. Unchanged files (same size and
+        md5Checksum) are skipped, changed files are updated in place and new files are
+        uploaded. A local state DB of (path, size, mtime, md5, file_id) lets files whose
+        size and mtime did not change be skipped without hashing them.
+        A name used by several remote files (or folders) of one folder is ambiguous: that
+        entry is not synced and is reported in self.errors.
+
+        Parameters
+        ----------
+        local_dir : str
+            Local folder whose content is synced.
+        folder_id : str or None
+            Drive folder ID. If None, use settings.upload.save_folder_id or the root directory.
+        chunksize : int, "auto" or None
+            Chunk size for resumable upload in bytes. If None, use settings.upload.chunksize.
+            "auto" adapts it to the measured throughput and latency of each transfer.
+        delete : bool or None
+            Whether to move remote files that no longer exist locally to the trash.
+            If None, use settings.sync.delete (default False).
+        max_workers : int or None
+            Number of files uploaded in parallel. If None, use settings.upload.max_workers.
+
+        Returns
+        -------
+        dict
+            {"uploaded": [(local_path, file_id)], "updated": [...], "skipped": [...],
+             "deleted": [(remote_name, file_id)]}
+        """
+        # Defaults from settings
+        sync_settings = self.settings.get("sync") or {}
+        if folder_id is None:
+            folder_id = self.settings.upload.save_folder_id
+        if chunksize is None:
+            chunksize = self.settings.upload.chunksize
+        if delete is None:
+            delete = sync_settings.get("delete", False)
+        if max_workers is None:
+            max_workers = self.settings.upload.get("max_workers", 1)
+        if not os.path.isdir(local_dir):
+            raise NotADirectoryError(f"Local folder not found: {local_dir}")
+        state_file = sync_settings.get("state_file")
+        if not state_file:
+            token_dir = os.path.dirname(self.settings.google_drive.save_token_file or "")
+            state_file = os.path.join(token_dir, "sync_state.sqlite")
+        state = SyncState(state_file)
+        try:
+            # ---------- step 1. compare the local tree with the remote folders ----------
+            manifest = scan_local([local_dir])
+            tree = self._manifest_tree(manifest)
+            results = {"uploaded": [], "updated": [], "skipped": [], "deleted": []}
+            self.errors = []
+            tasks = []  # (kind, local entry, remote folder id, existing file id or None)
+            level = [(local_dir, folder_id or "root")]
+            while level:
+                # All remote folders of one depth are listed together
+                listings = self._list_children_many([remote_folder for _, remote_folder in level])
+                folders = []
+                for local_folder, remote_folder in level:
+                    remote = {}
+                    for row in listings[remote_folder]:
+                        remote.setdefault(row[1], []).append(row)
+                    seen = set()
+                    for entry in tree.get(local_folder, []):
+                        name = os.path.basename(entry.path)
+                        seen.add(name)
+                        rows = [row for row in remote.get(name, [])
+                                if (row[2] == self.FOLDER_MIME) == entry.is_dir]
+                        if len(rows) > 1:
+                            # Drive allows several files of one name: which one is "the" copy is ambiguous
+                            error = "%d %s named %r in Drive folder %s; not synced" % (
+                                len(rows), "folders" if entry.is_dir else "files", name, remote_folder)
+                            self.logger.warning("Skipped: %s (%s)", entry.path, error)
+                            self.errors.append((entry.path, error))
+                            continue
+                        row = rows[0] if rows else None
+                        if entry.is_dir:
+                            if row is not None:
+                                sub_folder_id = row[0]
+                            else:
+                                sub_folder_id = self.create_folder(name, parent_folder_id=remote_folder)
+                            folders.append((entry.path, sub_folder_id))
+                        elif row is None:
+                            tasks.append(("uploaded", entry, remote_folder, None))
+                        else:
+                            remote_id, remote_size, remote_md5 = row[0], row[3], row[4]
+                            if remote_size is None or int(remote_size) != entry.size:
+                                # A different size is enough to tell the file changed: no need to hash it
+                                tasks.append(("updated", entry, remote_folder, remote_id))
+                                continue
+                            known = state.get(entry.path)
+                            if (known and known["file_id"] == remote_id and known["size"] == entry.size
+                                    and known["mtime"] == entry.mtime):
+                                # Local file untouched since the last sync: no need to hash it
+                                md5 = known["md5"] or remote_md5
+                            else:
+                                md5 = file_md5(entry.path)
+                            if md5 == remote_md5:
+                                state.put(entry.path, entry.size, entry.mtime, md5, remote_id)
+                                results["skipped"].append((entry.path, remote_id))
+                            else:
+                                tasks.append(("updated", entry, remote_folder, remote_id))
+                    if delete:
+                        for name, rows in remote.items():
+                            if name in seen:
+                                continue
+                            for row in rows:
+                                self._execute(self._get_service().files().update(
+                                    fileId=row[0], body={"trashed": True}, supportsAllDrives=True))
+                                self._mark_index_stale()
+                                self.logger.info("Moved to trash: %s (ID: %s)", name, row[0])
+                                results["deleted"].append((name, row[0]))
+                level = folders
+
+            # ---------- step 2. upload new and changed files ----------
+            self.logger.info("Sync: %d new, %d changed, %d unchanged, %d deleted",
+                             sum(t[0] == "uploaded" for t in tasks), sum(t[0] == "updated" for t in tasks),
+                             len(results["skipped"]), len(results["deleted"]))
+            def sync_one(task):
+                kind, entry, remote_folder, remote_id = task
+                response_meta = {}
+                new_id = self._safe_call(entry.path, self._upload_single, entry.path, os.path.basename(entry.path),
+                                         remote_folder, chunksize=chunksize, file_id=remote_id, response_meta=response_meta)
+                if new_id is not None:
+                    # md5Checksum of what was uploaded, so a later edit on Drive (even of the same size) is seen
+                    state.put(entry.path, entry.size, entry.mtime, response_meta.get("md5Checksum"), new_id)
+                results[kind].append((entry.path, new_id))
+            if max_workers > 1:
+                with self._worker_pool(max_workers) as pool:
+                    list(pool.map(sync_one, tasks))
+            else:
+                for task in tasks:
+                    sync_one(task)
+            state.prune(local_dir, [entry.path for entry in manifest if not entry.is_dir])
+        finally:
+            state.close()
+        self._log_errors("Sync")
+        return results
+
+    def scan_remote(self, file_ids) -> dict:
+        """
+        Scan remote files and folders (recursively) in a single pass.
+
+        Parameters
+        ----------
+        file_ids : str or list[str]
+            One file/folder ID or a list of IDs.
+
+        Returns
+        -------
+        dict
+            {"roots": [file_id, ...],
+             "nodes": {file_id: {"id", "name", "mimeType", "size", "md5Checksum",
+                                 "modifiedTime", "appProperties", "parent", "children"}}}
+            "children" (list of IDs) is only set for folders. Roots whose metadata
+            cannot be read are kept as empty folders named by their ID, with an "error"
+            that is also added to self.errors.
+        """
+        if isinstance(file_ids, str):
+            file_ids = [file_ids]
+        roots = list(file_ids)
+        nodes = {}
+        folders = []
+        metas = {}
+        if self._index_current():
+            for file_id in roots:
+                meta = self._index_call(self.index.get, file_id)
+                if meta is not None:
+                    metas[file_id] = meta
+        fetched, errors = self._get_many([f for f in roots if f not in metas], self.DOWNLOAD_FIELDS)
+        metas.update(fetched)
+        for file_id in roots:
+            if file_id in metas:
+                node = self._remote_node(metas[file_id], parent=None)
+                if "children" in node:
+                    folders.append(file_id)
+            else:
+                self.logger.warning("Failed to get metadata for file_id=%s: %s", file_id, errors[file_id])
+                self.errors.append((file_id, str(errors[file_id])))
+                node = {"id": file_id, "name": file_id, "mimeType": None, "parent": None,
+                        "children": [], "error": str(errors[file_id])}
+            nodes[file_id] = node
+
+        # Breadth-first listing, one level at a time; every folder is listed exactly once
+        while folders:
+            listings = self._list_children_many(folders)
+            folders = []
+            for folder_id, rows in listings.items():
+                for row in rows:
+                    meta = dict(zip(MetadataIndex.FIELDS, row))
+                    node = self._remote_node(meta, parent=folder_id)
+                    nodes[folder_id]["children"].append(node["id"])
+                    if node["id"] not in nodes and "children" in node:
+                        folders.append(node["id"])
+                    nodes.setdefault(node["id"], node)
+        return {"roots": roots, "nodes": nodes}
+
+    def _remote_node(self, meta: dict, parent: str | None) -> dict:
+        node = {
+            "id": meta["id"],
+            "name": meta.get("name", meta["id"]),
+            "mimeType": meta.get("mimeType"),
+            "size": meta.get("size"),
+            "md5Checksum": meta.get("md5Checksum"),
+            "modifiedTime": meta.get("modifiedTime"),
+            "appProperties": meta.get("appProperties"),
+            "parent": parent,
+        }
+        if node["mimeType"] == self.FOLDER_MIME:
+            node["children"] = []
+        return node
+
+    def _check_remote_files(self, file_id_list, check_info=None, snapshot=None):
+        # Check remote files exist (count and size from the remote snapshot)
+        if snapshot is None:
+            snapshot = self.scan_remote(file_id_list)
+        nodes = snapshot["nodes"]
         info = {"File_num": 0, "Folder_num": 0, "Total_size": 0}
 
         for file_id in file_id_list:
-            try:
-                meta = self.service.files().get(fileId=file_id, fields="name,mimeType,size").execute()
-                if_file = '.folder' not in meta.get("mimeType")
-            except:
-                if_file = False
-
-            if if_file:
+            node = nodes[file_id]
+            if "error" in node:
+                continue
+            if "children" not in node:
                 # is a file
                 info["File_num"] += 1
-                size_str = meta.get("size")
+                size_str = node.get("size")
                 if size_str is not None:
                     info["Total_size"] += int(size_str)
             else:
                 # is a folder
                 info["Folder_num"] += 1
-                children = self._list_children(file_id)
-                sub_file_ids = [f[0] for f in children]
-                sub_info = self._check_remote_files(sub_file_ids)
+                sub_info = self._check_remote_files(node["children"], snapshot=snapshot)
                 info["File_num"] += sub_info["File_num"]
                 info["Folder_num"] += sub_info["Folder_num"]
                 info["Total_size"] += sub_info["Total_size"]
@@ -696,26 +1826,65 @@ class GoogleDriveTools:
         return check_info
     
     def _list_children(self, folder_id: str):
-        page_token = None
-        files_id = []
-        while True:
-            resp = self.service.files().list(
-                q=f"'{folder_id}' in parents and trashed=false",
-                fields="nextPageToken, files(id,name,mimeType,size)",
-                pageToken=page_token,
-                supportsAllDrives=True,
-                includeItemsFromAllDrives=True,
-            ).execute()
+        return self._list_children_many([folder_id])[folder_id]
 
-            for f in resp.get("files", []):
-                files_id.append([f["id"], f["name"], f["mimeType"], f.get("size")])
+    def _real_folder_id(self, folder_id: str) -> str:
+        # Drive reports the real ID of My Drive in 'parents' (and in changes), never the alias "root"
+        if folder_id != "root":
+            return folder_id
+        if self._root_id is None:
+            self._root_id = self._execute(self._get_service().files().get(fileId="root", fields="id"))["id"]
+        return self._root_id
 
-            page_token = resp.get("nextPageToken")
-            if not page_token:
-                break
-        return files_id
+    def _list_children_many(self, folder_ids) -> dict:
+        # List the children of many folders with few requests; returns {folder_id: rows}, each row
+        # [id, name, mimeType, size, md5Checksum, modifiedTime, appProperties]. Folders already in
+        # the (current) metadata index are served from it; the others are listed with OR'ed
+        # "in parents" queries of up to LIST_MAX_PARENTS folders, and the parents field maps every
+        # result back (so the alias "root" is listed under its real ID).
+        requested = list(dict.fromkeys(folder_ids))
+        real_ids = {folder_id: self._real_folder_id(folder_id) for folder_id in requested}
+        folder_ids = list(dict.fromkeys(real_ids.values()))
+        listings = {}
+        if self._index_current():
+            for folder_id in folder_ids:
+                rows = self._index_call(self.index.children, folder_id)
+                if rows is not None:
+                    listings[folder_id] = rows
+        pending = [f for f in folder_ids if f not in listings]
+        for start in range(0, len(pending), self.LIST_MAX_PARENTS):
+            chunk = pending[start:start + self.LIST_MAX_PARENTS]
+            for folder_id in chunk:
+                listings[folder_id] = []
+            parents = " or ".join(f"'{folder_id}' in parents" for folder_id in chunk)
+            page_token = None
+            while True:
+                resp = self._execute(self.service.files().list(
+                    q=f"({parents}) and trashed=false",
+                    fields="nextPageToken, files(id,name,mimeType,size,md5Checksum,modifiedTime,appProperties,parents)",
+                    pageSize=self.LIST_PAGE_SIZE,
+                    pageToken=page_token,
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                ))
+
+                for f in resp.get("files", []):
+                    row = [f["id"], f["name"], f["mimeType"], f.get("size"),
+                           f.get("md5Checksum"), f.get("modifiedTime"), f.get("appProperties")]
+                    for parent in f.get("parents", []):
+                        if parent in listings and parent in chunk:
+                            listings[parent].append(row)
+
+                page_token = resp.get("nextPageToken")
+                if not page_token:
+                    break
+            if self.index is not None:
+                for folder_id in chunk:
+                    self._index_call(self.index.store_listing, folder_id, listings[folder_id])
+        return {folder_id: listings[real_ids[folder_id]] for folder_id in requested}
     
-    def _download_files(self, remote_file_list, local_dir, folder_id=None, chunksize=None, download_results=None):
+    def _download_files(self, remote_file_list, local_dir, folder_id=None, chunksize=None, download_results=None, pool=None,
+                        segments=None, snapshot=None):
         # Defaults from settings
         if chunksize is None:
             chunksize = self.settings.download.chunksize
@@ -724,31 +1893,38 @@ class GoogleDriveTools:
         if download_results is None:
             download_results = {"folder_name": local_dir, "folder_id": folder_id, "content": []}
         # Download files
+        # Directories are only created here, by the walking thread, so workers never race on them
         if not os.path.exists(local_dir):
             os.makedirs(local_dir, exist_ok=True)
+        if snapshot is None:
+            snapshot = self.scan_remote(remote_file_list)
         for file_id in remote_file_list:
-            connect = False
-            try:
-                meta = self.service.files().get(fileId=file_id, fields="name,mimeType").execute()
-                if_file = '.folder' not in meta.get("mimeType")
-                connect = True
-            except:
-                if_file = False
-            
-            if if_file:
+            meta = snapshot["nodes"][file_id]
+            if "error" in meta:
+                # Unreadable root (already in self.errors): nothing to create or download
+                continue
+            if "children" not in meta:
                 # is a file
-                local_path = self._download_single(file_id, local_dir, chunksize=chunksize)
-                download_results['content'].append({"file_name": os.path.basename(local_path), "file_id": file_id})
+                entry = {"file_name": None, "file_id": file_id}
+                download_results['content'].append(entry)
+                if pool is None:
+                    local_path = self._download_single(file_id, local_dir, chunksize=chunksize, segments=segments,
+                                                       meta=meta)
+                    entry["file_name"] = os.path.basename(local_path) if local_path else None
+                else:
+                    # Keep listing while workers download; the entry is filled in when done
+                    future = pool.submit(self._download_single, file_id, local_dir,
+                                         chunksize=chunksize, segments=segments, meta=meta)
+                    future.add_done_callback(
+                        lambda f, entry=entry: entry.update(
+                            file_name=os.path.basename(f.result()) if f.result() else None))
             else:
                 # is a folder
-                if not connect:
-                    folder_name = file_id
-                else:
-                    folder_name = meta.get("name", file_id)
+                folder_name = meta.get("name", file_id)
                 new_local_dir = os.path.join(local_dir, folder_name)
-                children = self._list_children(file_id)
-                sub_file_ids = [f[0] for f in children]
-                sub_download_results = self._download_files(sub_file_ids, new_local_dir, folder_id=file_id, chunksize=chunksize)
+                sub_download_results = self._download_files(meta["children"], new_local_dir, folder_id=file_id,
+                                                            chunksize=chunksize, pool=pool, segments=segments,
+                                                            snapshot=snapshot)
                 download_results['content'].append(sub_download_results)
         return download_results
 
@@ -756,11 +1932,15 @@ class GoogleDriveTools:
     def download2(self,
                   file_id: str | list[str] | None = None,
                   save_local_dir: str | None = None,
-                  chunksize=None) -> list[str]:
+                  chunksize=None,
+                  max_workers=None,
+                  segments=None) -> list[str]:
         """
         download files or folders from google drive
         
         :param self: 说明
+        :param max_workers: number of files downloaded in parallel (default settings.download.max_workers)
+        :param segments: parallel byte-range connections per large file (default settings.download.segments)
         """
         # Defaults from settings
         if file_id is None:
@@ -769,6 +1949,8 @@ class GoogleDriveTools:
             save_local_dir = self.settings.download.save_local_dir
         if chunksize is None:
             chunksize = self.settings.download.chunksize
+        if max_workers is None:
+            max_workers = self.settings.download.get("max_workers", 1)
 
         # Normalize file_id to list
         if isinstance(file_id, str):
@@ -781,16 +1963,251 @@ class GoogleDriveTools:
         if (save_local_dir is not None) and (not os.path.exists(save_local_dir)):
             os.makedirs(save_local_dir, exist_ok=True)
 
-        # Check remote files
-        check_info = self._check_remote_files(file_id_list)
+        # Check remote files (one traversal shared by the check and the download)
+        self.errors = []
+        snapshot = self.scan_remote(file_id_list)
+        check_info = self._check_remote_files(file_id_list, snapshot=snapshot)
         self.logger.info("Total need to download: %d files, %d folders, ( %s )",
                          check_info["File_num"], check_info["Folder_num"],
                          human_size(check_info["Total_size"]))
         # Download files
-        download_results = self._download_files(file_id_list, save_local_dir, chunksize=int(chunksize))
+        if max_workers > 1:
+            with self._worker_pool(max_workers) as pool:
+                download_results = self._download_files(file_id_list, save_local_dir,
+                                                        chunksize=parse_chunksize(chunksize), pool=pool, segments=segments,
+                                                        snapshot=snapshot)
+        else:
+            download_results = self._download_files(file_id_list, save_local_dir,
+                                                    chunksize=parse_chunksize(chunksize), segments=segments,
+                                                    snapshot=snapshot)
+        self._log_errors("Download")
         return download_results
         
 
+    # ---------- public: mirror ----------
+    def mirror_down(self,
+                    folder_id: str,
+                    local_dir: str,
+                    chunksize=None,
+                    max_workers=None) -> dict:
+        """
+        Keep a local mirror of a Google Drive folder up to date.
+
+        The first run downloads the whole folder and stores a Changes API page token in
+        local_dir/.gdrive-mirror.json. Later runs ask changes.list only for what changed
+        since then, and download, move or delete just those files.
+
+        Parameters
+        ----------
+        folder_id : str
+            Drive folder ID to mirror ("root" for My Drive).
+        local_dir : str
+            Local directory holding the mirror (the content of the Drive folder).
+        chunksize : int, "auto" or None
+            Chunk size for resumable download in bytes. If None, use settings.download.chunksize.
+            "auto" adapts it to the measured throughput and latency of each transfer.
+        max_workers : int or None
+            Number of files downloaded in parallel. If None, use settings.download.max_workers.
+
+        Returns
+        -------
+        dict
+            {"downloaded": [local_path], "moved": [(old_path, new_path)], "deleted": [local_path]}
+        """
+        # Defaults from settings
+        if chunksize is None:
+            chunksize = self.settings.download.chunksize
+        if max_workers is None:
+            max_workers = self.settings.download.get("max_workers", 1)
+        chunksize = parse_chunksize(chunksize)
+        os.makedirs(local_dir, exist_ok=True)
+        # Changes name parents by their real ID, never by the alias "root"
+        folder_id = self._real_folder_id(folder_id)
+
+        state = MirrorState(local_dir)
+        results = {"downloaded": [], "moved": [], "deleted": []}
+        self.errors = []
+        if state.folder_id != folder_id or not state.page_token:
+            # Full pass. The token is taken first, so changes made during the download are seen next time
+            self.logger.info("Mirror: full download of %s into %s", folder_id, local_dir)
+            state.folder_id = folder_id
+            state.page_token = self._execute(self._get_service().changes().getStartPageToken(
+                supportsAllDrives=True))["startPageToken"]
+            state.items = {}
+            state.retry = {}
+            if not self._mirror_subtree(folder_id, "", local_dir, state, results, chunksize, max_workers):
+                state.page_token = None  # the folder could not be read: full pass again next time
+        else:
+            self._mirror_changes(local_dir, state, results, chunksize, max_workers)
+        state.save()
+        self.logger.info("Mirror: %d downloaded, %d moved, %d deleted",
+                         len(results["downloaded"]), len(results["moved"]), len(results["deleted"]))
+        self._log_errors("Mirror")
+        return results
+
+    def _mirror_subtree(self, root_id, rel_path, local_dir, state, results, chunksize, max_workers) -> bool:
+        # Download a whole remote folder to local_dir/rel_path and record its items;
+        # False if the folder itself could not be read (the error is in self.errors)
+        nodes = self.scan_remote([root_id])["nodes"]
+        if "error" in nodes[root_id]:
+            return False
+        if rel_path:
+            state.items[root_id] = {"path": rel_path, "folder": True}
+        os.makedirs(os.path.join(local_dir, rel_path), exist_ok=True)
+        rel_paths = {root_id: rel_path}
+        order = [root_id]
+        jobs = []
+        for node_id in order:
+            for child_id in nodes[node_id].get("children", []):
+                child = nodes[child_id]
+                rel_paths[child_id] = os.path.join(rel_paths[node_id], self._local_name(child))
+                if "children" in child:
+                    os.makedirs(os.path.join(local_dir, rel_paths[child_id]), exist_ok=True)
+                    state.items[child_id] = {"path": rel_paths[child_id], "folder": True}
+                    order.append(child_id)
+                else:
+                    jobs.append((child, rel_paths[child_id]))
+        self._mirror_download(jobs, local_dir, state, results, chunksize, max_workers)
+        return True
+
+    def _mirror_changes(self, local_dir, state, results, chunksize, max_workers):
+        # Apply the changes reported by the Changes API since state.page_token
+        changes, new_token = self._list_changes(state.page_token)
+        if changes:
+            self._mark_index_stale()
+        latest = {}
+        for change in changes:
+            # Shared drive changes (changeType "drive") carry no fileId and touch no file
+            if change.get("changeType", "file") != "file" or not change.get("fileId"):
+                continue
+            latest[change["fileId"]] = change  # only the last change of a file matters
+        self.logger.info("Mirror: %d changed item(s) on Drive", len(latest))
+        # Items that failed last time are handled again, as if they had changed
+        for file_id in list(state.retry):
+            if file_id in latest:
+                continue
+            try:
+                file = self._execute(self._get_service().files().get(
+                    fileId=file_id, fields=self.CHANGE_FILE_FIELDS, supportsAllDrives=True))
+            except HttpError as e:
+                if e.resp.status != 404:
+                    self.logger.warning("Mirror: cannot retry %s yet: %s", state.retry[file_id], e)
+                    self.errors.append((state.retry[file_id], str(e)))
+                    continue
+                latest[file_id] = {"fileId": file_id, "removed": True}
+            else:
+                latest[file_id] = {"fileId": file_id, "removed": False, "file": file}
+        if state.retry:
+            self.logger.info("Mirror: retrying %d item(s) that failed last time", len(state.retry))
+
+        def parent_path(file):
+            # Relative path of the file's parent inside the mirror, or None if it is outside
+            if not file or file.get("trashed"):
+                return None
+            for parent in file.get("parents", []):
+                if parent == state.folder_id:
+                    return ""
+                item = state.items.get(parent)
+                if item and item["folder"]:
+                    return item["path"]
+            return None
+
+        # ---------- step 1. folders (repeated, so folders inside new folders are placed too) ----------
+        pending = [c for c in latest.values() if not c.get("removed")]
+        removed = [c for c in latest.values() if c.get("removed")]
+        placed = True
+        while placed:
+            placed = False
+            for change in list(pending):
+                file = change.get("file")
+                if not file or file.get("mimeType") != self.FOLDER_MIME:
+                    continue
+                parent = parent_path(file)
+                if parent is None:
+                    continue
+                pending.remove(change)
+                placed = True
+                rel_path = os.path.join(parent, file["name"])
+                item = state.items.get(file["id"])
+                if item is None:
+                    # New folder, or one moved into the mirror: fetch its whole content
+                    if self._mirror_subtree(file["id"], rel_path, local_dir, state, results, chunksize, max_workers):
+                        state.retry.pop(file["id"], None)
+                    else:
+                        state.retry[file["id"]] = rel_path
+                elif item["path"] != rel_path:
+                    self._mirror_move(item["path"], rel_path, local_dir, state, results)
+
+        # ---------- step 2. files, and everything that left the mirror ----------
+        jobs = []
+        for change in removed + pending:
+            file = change.get("file")
+            item = state.items.get(change["fileId"])
+            parent = None if change.get("removed") else parent_path(file)
+            if parent is None:
+                state.retry.pop(change["fileId"], None)
+                if item is not None:
+                    self._mirror_delete(item["path"], local_dir, state, results)
+                continue
+            if file.get("mimeType") == self.FOLDER_MIME:
+                continue
+            rel_path = os.path.join(parent, self._local_name(file))
+            if item is not None and item["path"] != rel_path:
+                self._mirror_move(item["path"], rel_path, local_dir, state, results)
+            if (item is None or item.get("md5Checksum") != file.get("md5Checksum")
+                    or item.get("modifiedTime") != file.get("modifiedTime")):
+                jobs.append((file, rel_path))
+        self._mirror_download(jobs, local_dir, state, results, chunksize, max_workers)
+        # Failed downloads are kept in state.retry, so the token can move on
+        state.page_token = new_token
+
+    def _mirror_download(self, jobs, local_dir, state, results, chunksize, max_workers):
+        # Download (meta, relative path) jobs into the mirror and record them; failed ones are
+        # remembered in state.retry for the next refresh
+        def fetch(job):
+            meta, rel_path = job
+            save_dir = os.path.join(local_dir, os.path.dirname(rel_path))
+            local_path = self._download_single(meta["id"], save_dir, chunksize=chunksize, meta=meta)
+            if local_path:
+                state.items[meta["id"]] = {"path": os.path.relpath(local_path, local_dir), "folder": False,
+                                           "md5Checksum": meta.get("md5Checksum"),
+                                           "modifiedTime": meta.get("modifiedTime")}
+                state.retry.pop(meta["id"], None)
+                results["downloaded"].append(local_path)
+            else:
+                state.retry[meta["id"]] = rel_path
+        if max_workers > 1 and len(jobs) > 1:
+            with self._worker_pool(max_workers) as pool:
+                list(pool.map(fetch, jobs))
+        else:
+            for job in jobs:
+                fetch(job)
+
+    def _mirror_move(self, old_path, new_path, local_dir, state, results):
+        # Rename a mirrored file/folder and re-point every item below it
+        old_abs, new_abs = os.path.join(local_dir, old_path), os.path.join(local_dir, new_path)
+        os.makedirs(os.path.dirname(new_abs), exist_ok=True)
+        if os.path.exists(old_abs):
+            os.replace(old_abs, new_abs)
+        for item in state.items.values():
+            if item["path"] == old_path or item["path"].startswith(old_path + os.sep):
+                item["path"] = new_path + item["path"][len(old_path):]
+        self.logger.info("Moved: %s -> %s", old_abs, new_abs)
+        results["moved"].append((old_abs, new_abs))
+
+    def _mirror_delete(self, rel_path, local_dir, state, results):
+        # Delete a mirrored file/folder and forget every item below it
+        local_path = os.path.join(local_dir, rel_path)
+        if os.path.isdir(local_path):
+            shutil.rmtree(local_path)
+        elif os.path.exists(local_path):
+            os.remove(local_path)
+        for file_id in [k for k, v in state.items.items()
+                        if v["path"] == rel_path or v["path"].startswith(rel_path + os.sep)]:
+            del state.items[file_id]
+        self.logger.info("Deleted: %s", local_path)
+        results["deleted"].append(local_path)
+
 def parse_proxy(proxy_str: str,
                 default_port: int = 1080,
                 default_type: str = "http") -> tuple[str, str, int]:
@@ -0,0 +1,184 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/17 22:20:51
+@Author   :   QuYue
+@File     :   daemon.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   'gdrive-tools serve': a warm GoogleDriveTools behind a Unix socket, and its client
+'''
+
+
+#%% Import Packages
+# Basic
+import os
+import copy
+import json
+import stat
+import signal
+import socket
+import tempfile
+import threading
+import socketserver
+
+
+#%% Protocol
+# One JSON line per request, one JSON line per response, then the connection is closed:
+#   -> {"command": "upload", "args": {"local_file": [...], ...}}
+#   <- {"ok": true, "result": ..., "errors": [[item, message], ...]}
+#   <- {"ok": false, "error": "message"}
+# command -> GoogleDriveTools method
+COMMANDS = {
+    "upload": "upload",
+    "download": "download",
+    "sync": "sync_up",
+    "mirror": "mirror_down",
+    "set_rate_limit": "set_rate_limit",
+}
+
+
+class DaemonError(RuntimeError):
+    """The daemon is not reachable, or the job failed on the daemon."""
+
+
+def default_socket() -> str:
+    # Socket in $XDG_RUNTIME_DIR (private to the user), or else in a folder of our own (mode 0700)
+    # in the temporary directory: other users must not be able to take the path first
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "gdrive-tools.sock")
+    folder = os.path.join(tempfile.gettempdir(), f"gdrive-tools-{os.getuid()}")
+    try:
+        os.mkdir(folder, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(folder)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077:
+        raise DaemonError(f"{folder} is not a private folder of this user; choose a socket with --socket")
+    return os.path.join(folder, "daemon.sock")
+
+
+def _check_owner(socket_path: str):
+    # Only send jobs (paths, file IDs) to a daemon of the same user
+    try:
+        st = os.stat(socket_path)
+    except OSError as e:
+        raise DaemonError(f"No daemon on {socket_path} (start one with 'gdrive-tools serve'): {e}")
+    if st.st_uid != os.getuid():
+        raise DaemonError(f"{socket_path} belongs to another user (uid {st.st_uid}); refusing to send jobs to it")
+
+
+#%% Server
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return  # a probe (see _remove_stale_socket) connected and left
+        try:
+            request = json.loads(line)
+            response = self.server.run_job(request.get("command"), request.get("args") or {})
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Runs upload/download/sync/mirror jobs on one warm GoogleDriveTools instance.
+
+    Settings, token, proxy and Drive service are set up once; every job
+    shares the connection pool, the token refresh, the metadata index and
+    the process-wide rate limits. Jobs run concurrently, each on a shallow
+    copy of the instance so that its errors are reported to its own client.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, gdt):
+        self.socket_path = socket_path
+        self.gdt = gdt
+        self._remove_stale_socket()
+        super().__init__(socket_path, _Handler)
+        # Jobs act on the owner's Drive account: keep other users off the socket
+        os.chmod(socket_path, 0o600)
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)  # left behind by a daemon that died
+        else:
+            raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    def run_job(self, command: str, args: dict) -> dict:
+        if command == "ping":
+            return {"ok": True, "result": {"pid": os.getpid()}, "errors": []}
+        if command not in COMMANDS:
+            raise ValueError(f"Unknown command: {command} (expected one of {', '.join(COMMANDS)})")
+        job = copy.copy(self.gdt)
+        job.errors = []
+        job.duplicates = {}
+        job._local = threading.local()
+        job._index_checked = None  # see the writes of earlier jobs
+        job.service = job._build_service(job.creds, verbose=False)
+        self.gdt.logger.info("Daemon job: %s %s", command, args)
+        result = getattr(job, COMMANDS[command])(**args)
+        return {"ok": True, "result": result, "errors": job.errors}
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def serve(gdt, socket_path: str | None = None) -> int:
+    # Serve jobs until SIGINT / SIGTERM
+    socket_path = socket_path or default_socket()
+    server = DaemonServer(socket_path, gdt)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    gdt.logger.info("Daemon listening on %s (pid %d)", socket_path, os.getpid())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        gdt.logger.info("Daemon stopped.")
+    finally:
+        server.server_close()
+    return 0
+
+
+#%% Client
+class DaemonClient:
+    """
+    Thin client of DaemonServer: call(command, **args) returns (result, errors).
+    """
+    def __init__(self, socket_path: str | None = None):
+        self.socket_path = socket_path or default_socket()
+
+    def call(self, command: str, **args):
+        _check_owner(self.socket_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                raise DaemonError(f"No daemon on {self.socket_path} (start one with 'gdrive-tools serve'): {e}")
+            with sock.makefile("rwb") as f:
+                f.write(json.dumps({"command": command, "args": args}).encode("utf-8") + b"\n")
+                f.flush()
+                line = f.readline()
+        finally:
+            sock.close()
+        if not line:
+            raise DaemonError("The daemon closed the connection without a response")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "unknown error"))
+        return response.get("result"), response.get("errors", [])
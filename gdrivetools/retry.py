@@ -0,0 +1,143 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/17 18:40:05
+@Author   :   QuYue
+@File     :   retry.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   retry policy and API rate limiting
+'''
+
+
+#%% Import Packages
+# Basic
+import ssl
+import time
+import json
+import random
+import socket
+import logging
+import threading
+import http.client
+import httplib2
+
+# Google API
+from googleapiclient.errors import HttpError
+
+
+#%% Errors
+class TransientError(IOError):
+    """A response that is worth retrying although the server did not say so (e.g. an empty body)."""
+
+
+# Statuses worth retrying, and the 403 reasons Drive uses for rate limits
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+RETRY_REASONS = {"userRateLimitExceeded", "rateLimitExceeded", "backendError", "internalError"}
+# Transport errors: connection reset / refused, timeouts, TLS and DNS failures
+RETRY_EXCEPTIONS = (ConnectionError, TimeoutError, socket.timeout, ssl.SSLError,
+                    http.client.HTTPException, httplib2.HttpLib2Error, TransientError)
+
+
+def _error_reason(error: HttpError) -> str | None:
+    try:
+        data = json.loads(error.content.decode("utf-8"))
+        return data["error"]["errors"][0]["reason"]
+    except Exception:
+        return None
+
+
+#%% RetryPolicy
+class RetryPolicy:
+    """
+    Exponential backoff with jitter for Drive API calls.
+
+    A call is retried on transport errors, on 408/429/5xx and on 403 rate-limit
+    reasons. The n-th retry waits a random time between half and all of
+    base_delay * 2**n (at most max_delay), or what a Retry-After header asks for.
+    """
+    def __init__(self, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 64.0,
+                 logger: logging.Logger | None = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.logger = logger or logging.getLogger("gdrive")
+
+    def classify(self, error: BaseException) -> tuple[bool, float | None]:
+        # (retryable, seconds asked for by Retry-After or None)
+        if isinstance(error, HttpError):
+            status = error.resp.status
+            retry_after = None
+            try:
+                retry_after = float(error.resp.get("retry-after"))
+            except (TypeError, ValueError):
+                pass
+            if status in RETRY_STATUSES:
+                return True, retry_after
+            if status == 403 and _error_reason(error) in RETRY_REASONS:
+                return True, retry_after
+            return False, None
+        return isinstance(error, RETRY_EXCEPTIONS), None
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        backoff = min(self.base_delay * 2 ** attempt, self.max_delay)
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def call(self, func, *args, before_retry=None, **kwargs):
+        # Call func until it succeeds, fails with a non-retryable error or runs out of retries;
+        # before_retry(error) runs before every new attempt
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                retryable, retry_after = self.classify(e)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                wait = self.delay(attempt, retry_after)
+                attempt += 1
+                self.logger.warning("%s: retry %d/%d in %.1fs", e, attempt, self.max_retries, wait)
+                time.sleep(wait)
+                if before_retry is not None:
+                    before_retry(e)
+
+
+#%% RateLimiter
+class RateLimiter:
+    """
+    Thread-safe token bucket. acquire(n) blocks until n tokens are available.
+
+    With rate None the limiter is open. The bucket holds at most `burst` tokens,
+    so a pause does not turn into a later burst above the rate.
+    """
+    def __init__(self, rate: float | None = None, burst: float | None = None):
+        self._lock = threading.Lock()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: float | None, burst: float | None = None):
+        with self._lock:
+            self.rate = rate
+            self.burst = burst if burst is not None else (rate or 0)
+            self._tokens = self.burst
+            self._stamp = time.monotonic()
+
+    def acquire(self, n: float = 1):
+        while True:
+            with self._lock:
+                if not self.rate:
+                    return
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                # Requests larger than the bucket go through once it is full
+                need = min(n, self.burst)
+                if self._tokens >= need:
+                    self._tokens -= n
+                    return
+                wait = (need - self._tokens) / self.rate
+            # Wake up at least every second, so a new rate applies to waiting callers
+            time.sleep(min(wait, 1.0))
+
+
+# Process-wide limiter of Drive API calls, shared by every GoogleDriveTools instance
+api_limiter = RateLimiter()
@@ -0,0 +1,376 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/17 10:02:11
+@Author   :   QuYue
+@File     :   state.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   on-disk state kept between runs
+'''
+
+
+#%% Import Packages
+# Basic
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+#%% Helpers
+def write_json_atomic(path: str, data):
+    # Write to a temporary file and rename, so a crash never leaves a torn file
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+#%% FileLock
+class FileLock:
+    """
+    Exclusive lock on a file, held across processes (fcntl.flock, or msvcrt on Windows).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        self._fh = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after about 10 seconds
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+#%% UploadJournal
+class UploadJournal:
+    """
+    Small JSON journal of resumable upload sessions.
+
+    For every upload in flight it stores the session URI, the local file
+    fingerprint (path, size, mtime) and the last offset acknowledged by the
+    server, so a killed process can continue the upload on the next run.
+    Updates hold a lock on '<journal>.lock', so processes sharing the file
+    (several CLI runs, or the daemon) keep each other's entries.
+    """
+    # Drive keeps resumable sessions for about a week
+    MAX_AGE = 7 * 24 * 3600
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(local_file: str, save_file_name: str, folder_id: str | None) -> tuple[str, dict]:
+        # Identify an upload by its local file state and its Drive target
+        st = os.stat(local_file)
+        info = {
+            "path": os.path.abspath(local_file),
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "name": save_file_name,
+            "folder_id": folder_id,
+        }
+        key = hashlib.sha1(json.dumps(info, sort_keys=True).encode("utf-8")).hexdigest()
+        return key, info
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            return self._load().get(key)
+
+    def put(self, key: str, info: dict, uri: str, offset: int):
+        with self._lock, FileLock(self.path + ".lock"):
+            data = self._load()
+            data[key] = dict(info, uri=uri, offset=offset, updated=time.time())
+            self._save(data)
+
+    def remove(self, key: str):
+        with self._lock, FileLock(self.path + ".lock"):
+            data = self._load()
+            if data.pop(key, None) is not None:
+                self._save(data)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {k: v for k, v in data.items() if now - v.get("updated", 0) < self.MAX_AGE}
+
+    def _save(self, data: dict):
+        write_json_atomic(self.path, data)
+
+
+#%% Partial downloads
+def _part_tag_path(part_path: str) -> str:
+    return part_path + ".json"
+
+
+def load_part_tag(part_path: str) -> dict | None:
+    """
+    Return the tag (file_id, md5Checksum, modifiedTime, size) of a .part file,
+    or None if it has no readable tag.
+    """
+    try:
+        with open(_part_tag_path(part_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_part_tag(part_path: str, tag: dict):
+    tmp_path = _part_tag_path(part_path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(tag, f)
+    os.replace(tmp_path, _part_tag_path(part_path))
+
+
+def remove_part_tag(part_path: str):
+    try:
+        os.remove(_part_tag_path(part_path))
+    except FileNotFoundError:
+        pass
+
+
+#%% SyncState
+class SyncState:
+    """
+    SQLite table of (path, size, mtime, md5, file_id) for files synced by
+    sync_up, so unchanged files can be skipped without hashing them again.
+    """
+    def __init__(self, path: str):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, md5 TEXT, file_id TEXT)")
+
+    def get(self, path: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, md5, file_id FROM files WHERE path = ?",
+                (os.path.abspath(path),)).fetchone()
+        if row is None:
+            return None
+        return {"size": row[0], "mtime": row[1], "md5": row[2], "file_id": row[3]}
+
+    def put(self, path: str, size: int, mtime: float, md5: str | None, file_id: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime, md5, file_id) VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(path), size, mtime, md5, file_id))
+
+    def prune(self, root: str, keep_paths):
+        # Forget files under root that are no longer present locally
+        root = os.path.join(os.path.abspath(root), "")
+        keep = {os.path.abspath(p) for p in keep_paths}
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(root), root)).fetchall()
+            stale = [(p,) for (p,) in rows if p not in keep]
+            self._conn.executemany("DELETE FROM files WHERE path = ?", stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+#%% MirrorState
+class MirrorState:
+    """
+    State of a local mirror of a Drive folder, stored as JSON inside the mirror.
+
+    It keeps the Changes API page token of the last refresh, for every
+    mirrored item its path relative to the mirror root, and the items that
+    failed to download, which the next refresh tries again.
+    """
+    FILE_NAME = ".gdrive-mirror.json"
+
+    def __init__(self, local_dir: str):
+        self.path = os.path.join(local_dir, self.FILE_NAME)
+        self.folder_id = None
+        self.page_token = None
+        # {file_id: {"path": relative path, "folder": bool, "md5Checksum": str, "modifiedTime": str}}
+        self.items = {}
+        # {file_id: relative path} of downloads that failed
+        self.retry = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.folder_id = data.get("folder_id")
+            self.page_token = data.get("page_token")
+            self.items = data.get("items", {})
+            self.retry = data.get("retry", {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        write_json_atomic(self.path, {
+            "folder_id": self.folder_id,
+            "page_token": self.page_token,
+            "items": self.items,
+            "retry": self.retry,
+        })
+
+
+#%% MetadataIndex
+class MetadataIndex:
+    """
+    Persistent SQLite index of Drive metadata (file ID -> name, parents,
+    mimeType, size, md5Checksum, modifiedTime, appProperties).
+
+    It is filled from folder listings and kept fresh by applying the Changes
+    API; a folder's children are served from the index once the folder has
+    been listed completely.
+    """
+    # Bumped when the tables change; an index of another version is rebuilt
+    SCHEMA = "2"
+    FIELDS = ("id", "name", "mimeType", "size", "md5Checksum", "modifiedTime", "appProperties")
+
+    def __init__(self, path: str):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            if row is None or row[0] != self.SCHEMA:
+                self._conn.executescript(
+                    "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS parents;"
+                    "DROP TABLE IF EXISTS listed; DELETE FROM meta;")
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('schema', ?)", (self.SCHEMA,))
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "  id TEXT PRIMARY KEY, name TEXT, mimeType TEXT, size TEXT,"
+                "  md5Checksum TEXT, modifiedTime TEXT, appProperties TEXT);"
+                "CREATE TABLE IF NOT EXISTS parents ("
+                "  child_id TEXT, parent_id TEXT, PRIMARY KEY (child_id, parent_id));"
+                "CREATE INDEX IF NOT EXISTS parents_by_parent ON parents (parent_id);"
+                "CREATE TABLE IF NOT EXISTS listed (folder_id TEXT PRIMARY KEY);")
+
+    # ----- meta -----
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ----- files -----
+    def get(self, file_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, mimeType, size, md5Checksum, modifiedTime, appProperties FROM files WHERE id = ?",
+                (file_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(self.FIELDS, self._row(row)))
+
+    # ----- listings -----
+    def children(self, folder_id: str) -> list[list] | None:
+        # [[id, name, mimeType, size, md5Checksum, modifiedTime, appProperties], ...], or None if never listed
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM listed WHERE folder_id = ?", (folder_id,)).fetchone() is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT f.id, f.name, f.mimeType, f.size, f.md5Checksum, f.modifiedTime, f.appProperties "
+                "FROM parents p JOIN files f ON f.id = p.child_id WHERE p.parent_id = ? ORDER BY p.rowid",
+                (folder_id,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def store_listing(self, folder_id: str, rows):
+        # Replace the known children of folder_id with a complete listing
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM parents WHERE parent_id = ?", (folder_id,))
+            for row in rows:
+                self._upsert(row)
+                self._conn.execute("INSERT OR IGNORE INTO parents (child_id, parent_id) VALUES (?, ?)",
+                                   (row[0], folder_id))
+            self._conn.execute("INSERT OR IGNORE INTO listed (folder_id) VALUES (?)", (folder_id,))
+
+    # ----- changes -----
+    def apply_change(self, change: dict):
+        # Apply one entry of changes.list (fields: changeType, fileId, removed, file(...));
+        # shared drive entries (changeType "drive") have no fileId and are skipped
+        file = change.get("file")
+        file_id = change.get("fileId")
+        if change.get("changeType", "file") != "file" or not file_id:
+            return
+        with self._lock, self._conn:
+            if change.get("removed") or not file or file.get("trashed"):
+                self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                self._conn.execute("DELETE FROM parents WHERE child_id = ? OR parent_id = ?", (file_id, file_id))
+                self._conn.execute("DELETE FROM listed WHERE folder_id = ?", (file_id,))
+                return
+            self._upsert([file_id, file.get("name"), file.get("mimeType"), file.get("size"),
+                          file.get("md5Checksum"), file.get("modifiedTime"), file.get("appProperties")])
+            self._conn.execute("DELETE FROM parents WHERE child_id = ?", (file_id,))
+            for parent in file.get("parents", []):
+                self._conn.execute("INSERT OR IGNORE INTO parents (child_id, parent_id) VALUES (?, ?)",
+                                   (file_id, parent))
+
+    def clear(self):
+        with self._lock, self._conn:
+            for table in ("files", "parents", "listed"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("DELETE FROM meta WHERE key != 'schema'")
+
+    def _upsert(self, row):
+        app_properties = json.dumps(row[6]) if len(row) > 6 and row[6] else None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (id, name, mimeType, size, md5Checksum, modifiedTime, appProperties) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", tuple(row[:6]) + (app_properties,))
+
+    @staticmethod
+    def _row(row) -> list:
+        row = list(row)
+        row[6] = json.loads(row[6]) if row[6] else None
+        return row
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,334 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/17 15:20:44
+@Author   :   QuYue
+@File     :   transfer.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   helpers for resumable transfers (chunk size tuning, streams, compression)
+'''
+
+
+#%% Import Packages
+# Basic
+import time
+import zlib
+import queue
+import threading
+from collections import deque
+
+# Google API
+from googleapiclient.http import MediaUpload
+
+# Self-defined
+from .utils import human_size
+from .retry import RateLimiter
+
+
+#%% Constants
+AUTO = "auto"
+# Resumable uploads must send chunks in multiples of 256 KiB (except the last one)
+UPLOAD_CHUNK_MULTIPLE = 256 * 1024
+
+
+def parse_chunksize(value) -> int | str:
+    # int chunk size in bytes, or AUTO
+    if isinstance(value, str) and value.strip().lower() == AUTO:
+        return AUTO
+    return int(value)
+
+
+#%% ChunkTuner
+class ChunkTuner:
+    """
+    Chunk size of one resumable transfer, adapted to the measured route.
+
+    Every chunk is timed. A line fitted through the recent (bytes, seconds)
+    samples gives the throughput (slope) and the fixed cost of a request, i.e.
+    the round-trip time (intercept). The next chunk is sized to last at least
+    MIN_SECONDS and TARGET_RTTS round trips, so high-latency routes get large
+    chunks and the per-request overhead stays small, within [min_size, max_size].
+    """
+    START = 8 * 1024 * 1024
+    MIN_SECONDS = 2.0
+    TARGET_RTTS = 20
+    MAX_GROWTH = 4
+    SAMPLES = 8
+
+    def __init__(self, min_size: int, max_size: int, multiple: int = 1):
+        self.multiple = max(int(multiple), 1)
+        self.min_size = max(self._round(int(min_size)), self.multiple)
+        self.max_size = max(self._round(int(max_size)), self.min_size)
+        self.chunksize = self._clamp(self.START)
+        self.throughput = None  # bytes per second
+        self.rtt = None         # seconds
+        self._samples = deque(maxlen=self.SAMPLES)
+        self._started = None
+
+    def _round(self, size: int) -> int:
+        return size - size % self.multiple
+
+    def _clamp(self, size: float) -> int:
+        return min(max(self._round(int(size)), self.min_size), self.max_size)
+
+    def start(self):
+        self._started = time.monotonic()
+
+    def update(self, nbytes: int) -> int:
+        # Record a chunk of nbytes sent since start(); returns the size of the next chunk
+        if self._started is None or nbytes <= 0:
+            return self.chunksize
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        self._started = None
+        self._samples.append((nbytes, elapsed))
+        if self._fit():
+            target = self.throughput * max(self.MIN_SECONDS, self.TARGET_RTTS * self.rtt)
+        else:
+            # Chunks of a single size cannot separate latency from throughput: probe another size
+            target = self.chunksize * 2 if self.chunksize * 2 <= self.max_size else self.chunksize / 2
+        self.chunksize = self._clamp(min(target, self.chunksize * self.MAX_GROWTH))
+        return self.chunksize
+
+    def _fit(self) -> bool:
+        # Least squares of seconds = rtt + bytes / throughput; False while the samples cannot tell them apart
+        n = len(self._samples)
+        mean_b = sum(b for b, _ in self._samples) / n
+        mean_t = sum(t for _, t in self._samples) / n
+        var_b = sum((b - mean_b) ** 2 for b, _ in self._samples)
+        slope = (sum((b - mean_b) * (t - mean_t) for b, t in self._samples) / var_b) if var_b else 0.0
+        if slope > 0:
+            self.throughput = 1 / slope
+            self.rtt = max(mean_t - slope * mean_b, 0.0)
+            return True
+        # All chunks of one size, or too noisy: keep the average rate
+        self.throughput = mean_b / mean_t
+        if self.rtt is None:
+            self.rtt = 0.0
+            return False
+        return True
+
+    def describe(self) -> str:
+        # The chosen chunk size in bytes (to pin it in settings), with what it was based on
+        if self.throughput is None:
+            return "%d (%s)" % (self.chunksize, human_size(self.chunksize))
+        return "%d (%s; throughput %s/s, RTT %.0f ms)" % (
+            self.chunksize, human_size(self.chunksize), human_size(self.throughput), self.rtt * 1000)
+
+
+#%% Bandwidth
+# Process-wide limits of transferred bytes per second, shared by every transfer
+upload_limiter = RateLimiter()
+download_limiter = RateLimiter()
+
+
+#%% Streams
+def is_stream(obj) -> bool:
+    # Binary file-like object (has read()), as opposed to a path; iterables (e.g. of paths) are not streams
+    return hasattr(obj, "read")
+
+
+def stream_name(obj) -> str:
+    name = getattr(obj, "name", None)
+    return name if isinstance(name, str) else "<stream>"
+
+
+class IterStream:
+    """
+    Binary file-like view (read() only) of an iterator of bytes, so that
+    generated content can be uploaded as a stream: upload(IterStream(blocks), "name").
+    """
+    def __init__(self, blocks, name: str | None = None):
+        self._blocks = iter(blocks)
+        self._rest = b""
+        if name is not None:
+            self.name = name
+
+    def read(self, n: int = -1) -> bytes:
+        # Up to n bytes (fewer at a block boundary), b"" at the end
+        if n is None or n < 0:
+            data, self._rest = self._rest + b"".join(self._blocks), b""
+            return data
+        while not self._rest:
+            block = next(self._blocks, None)
+            if block is None:
+                return b""
+            self._rest = bytes(block)
+        data, self._rest = self._rest[:n], self._rest[n:]
+        return data
+
+
+class StreamUpload(MediaUpload):
+    """
+    Resumable upload of a non-seekable stream of unknown size.
+
+    MediaIoBaseUpload needs seek() and the total size, so it cannot read a pipe.
+    Here only the current chunk (plus a little look-ahead) is held in memory:
+    bytes are dropped once the server has acknowledged them, and the size is
+    announced with the last chunk. The source is a binary file-like object or an
+    iterator of bytes.
+    """
+    def __init__(self, source, mimetype: str = "application/octet-stream", chunksize: int = 10 * 1024 * 1024):
+        super().__init__()
+        if hasattr(source, "read"):
+            self._read = source.read
+        else:
+            blocks = iter(source)
+            self._read = lambda n: next(blocks, b"")
+        self._mimetype = mimetype
+        self._chunksize = chunksize
+        self._start = 0            # offset of the first byte in the buffer
+        self._buffer = bytearray()
+        self._exhausted = False
+        self._eof = False          # the buffered chunk is the last one
+
+    def chunksize(self):
+        # A full last chunk must still look short to next_chunk(), which then sends the total size
+        return self._chunksize + 1 if self._eof else self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        return None
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def getbytes(self, begin, length):
+        if begin < self._start:
+            raise IOError(f"Cannot rewind a stream to byte {begin} (buffer starts at {self._start})")
+        del self._buffer[:begin - self._start]
+        self._start = begin
+        while len(self._buffer) < length + 1 and not self._exhausted:
+            block = self._read(length + 1 - len(self._buffer))
+            if not block:
+                self._exhausted = True
+            else:
+                self._buffer += block
+        self._eof = self._exhausted and len(self._buffer) <= length
+        return bytes(self._buffer[:length])
+
+    def to_json(self):
+        raise NotImplementedError("A stream upload cannot be serialized")
+
+
+#%% Compression
+# codec -> suffix added to the Drive file name
+CODECS = {"gzip": ".gz", "zstd": ".zst"}
+CODEC_MIMETYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+# appProperties keys of a compressed upload
+APP_CODEC = "gdt_codec"
+APP_SIZE = "gdt_size"
+
+
+def _zstandard():
+    # zstandard is optional: only needed for the zstd codec
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("The zstd codec requires the 'zstandard' package: pip install zstandard") from e
+    return zstandard
+
+
+def compressor(codec: str):
+    # Streaming compressor with compress(data) / flush()
+    if codec == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if codec == "zstd":
+        return _zstandard().ZstdCompressor(level=3).compressobj()
+    raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(CODECS)})")
+
+
+def decompressor(codec: str):
+    # Streaming decompressor with decompress(data) / flush()
+    if codec == "gzip":
+        return zlib.decompressobj(31)
+    if codec == "zstd":
+        return _zstandard().ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(CODECS)})")
+
+
+def compressed_codec(meta: dict) -> str | None:
+    # Codec of a Drive file uploaded with compression, from its appProperties
+    codec = (meta.get("appProperties") or {}).get(APP_CODEC)
+    return codec if codec in CODECS else None
+
+
+class CompressedReader:
+    """
+    Iterator of compressed blocks of a local file or binary stream.
+
+    Reading and compressing run on a background thread, so the CPU work
+    overlaps with the upload of the previous blocks; at most QUEUE_BLOCKS
+    compressed blocks wait in memory.
+    """
+    BLOCK_SIZE = 1024 * 1024
+    QUEUE_BLOCKS = 8
+    _END = object()
+
+    def __init__(self, source, codec: str):
+        self.codec = codec
+        self.name = source if isinstance(source, str) else stream_name(source)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._compressor = compressor(codec)
+        self._source = source
+        self._queue = queue.Queue(maxsize=self.QUEUE_BLOCKS)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="gdrive-compress", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            if isinstance(self._source, str):
+                with open(self._source, "rb") as fh:
+                    self._pump(fh.read)
+            elif hasattr(self._source, "read"):
+                self._pump(self._source.read)
+            else:
+                blocks = iter(self._source)
+                self._pump(lambda n: next(blocks, b""))
+            tail = self._compressor.flush()
+            if tail:
+                self.bytes_out += len(tail)
+                self._put(tail)
+            self._put(self._END)
+        except BaseException as e:
+            self._put(e)
+
+    def _pump(self, read):
+        while not self._stop.is_set():
+            block = read(self.BLOCK_SIZE)
+            if not block:
+                return
+            self.bytes_in += len(block)
+            out = self._compressor.compress(block)
+            if out:
+                self.bytes_out += len(out)
+                self._put(out)
+
+    def _put(self, item):
+        # Wait for room, but give up once the consumer has gone away
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        item = self._queue.get()
+        if item is self._END:
+            self._queue.put(self._END)
+            raise StopIteration
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def close(self):
+        self._stop.set()
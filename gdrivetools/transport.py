@@ -0,0 +1,119 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/17 20:12:37
+@Author   :   QuYue
+@File     :   transport.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   pooled keep-alive HTTP transport for googleapiclient
+'''
+
+
+#%% Import Packages
+# Basic
+import threading
+import httplib2
+import requests
+from requests.adapters import HTTPAdapter
+
+# Google API
+from google.auth.transport.requests import AuthorizedSession, Request
+
+
+#%% Proxy
+# proxy type (see parse_proxy) -> requests proxy scheme; DNS is resolved by the proxy, as with httplib2
+PROXY_SCHEMES = {
+    "http": "http",
+    "https": "http",
+    "socks": "socks5h",
+    "socks5": "socks5h",
+    "socks4": "socks4a",
+}
+
+
+def proxy_urls(proxy: dict | None) -> dict:
+    # requests 'proxies' mapping for a proxy dict of GoogleDriveTools (ptype, host, port)
+    if not proxy:
+        return {}
+    url = f"{PROXY_SCHEMES.get(proxy['ptype'], 'http')}://{proxy['host']}:{proxy['port']}"
+    return {"http": url, "https": url}
+
+
+#%% PooledHttp
+class PooledHttp:
+    """
+    httplib2.Http look-alike for googleapiclient, backed by a requests
+    AuthorizedSession with a urllib3 connection pool.
+
+    The session is thread-safe and keeps connections alive, so all workers
+    share warm TLS connections (through the proxy, if any) instead of
+    opening one per Drive service. Requests carry (connect, read) timeouts.
+    Worker pools reserve() connections and the pool grows to the number of
+    threads using it, so no connection is thrown away as "pool is full".
+    """
+    def __init__(self, credentials, pool_size: int = 10, keep_alive: bool = True,
+                 connect_timeout: float = 30, read_timeout: float = 120, proxy: dict | None = None):
+        self.credentials = credentials  # read by googleapiclient (batches, media uploads)
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self._demand = 1  # threads that may use the pool at once (the caller's own thread)
+        self._lock = threading.Lock()
+        proxies = proxy_urls(proxy)
+        # Token refreshes go through the same proxy
+        auth_session = requests.Session()
+        auth_session.trust_env = False
+        auth_session.proxies.update(proxies)
+        self.session = AuthorizedSession(credentials, auth_request=Request(auth_session))
+        self.session.trust_env = False
+        self.session.proxies.update(proxies)
+        self._adapter = None
+        self._mount(pool_size)
+
+    def _mount(self, pool_size: int):
+        old = self._adapter
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        if old is not None:
+            # Idle connections of the old pool are closed; busy ones are closed when released
+            old.close()
+
+    def reserve(self, n: int):
+        # n more threads (a worker pool) will use the connections; grow the pool if needed
+        with self._lock:
+            self._demand += n
+            if self._demand > self.pool_size:
+                self.pool_size = self._demand
+                self._mount(self.pool_size)
+
+    def release(self, n: int):
+        with self._lock:
+            self._demand -= n
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        # Same signature and return value as httplib2.Http.request: (Response, content)
+        headers = dict(headers or {})
+        if not self.keep_alive:
+            headers["connection"] = "close"
+        # Only downloads follow redirects: uploads must see 308 "resume incomplete" themselves
+        # (googleapiclient tells httplib2 the same), and a redirect must not replay a body
+        allow_redirects = redirections > 0 and method in ("GET", "HEAD")
+        try:
+            resp = self.session.request(method, uri, data=body, headers=headers, timeout=self.timeout,
+                                        allow_redirects=allow_redirects)
+        except requests.exceptions.Timeout as e:
+            raise TimeoutError(str(e)) from e
+        except requests.exceptions.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+        info = {key.lower(): value for key, value in resp.headers.items()}
+        if info.get("content-encoding") in ("gzip", "deflate", "br"):
+            # requests decoded the body: describe the decoded content, like httplib2 does
+            info["-content-encoding"] = info.pop("content-encoding")
+            info["content-length"] = str(len(resp.content))
+        info["status"] = str(resp.status_code)
+        response = httplib2.Response(info)
+        response.reason = resp.reason
+        return response, resp.content
+
+    def close(self):
+        self.session.close()
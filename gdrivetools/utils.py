@@ -9,7 +9,10 @@
 
 
 #%% Import Packages
+import os
 import math
+import hashlib
+from collections import namedtuple
 
 #%% AttrDict
 class AttrDict(dict):
@@ -69,3 +72,79 @@ def human_size(n, precision=2):
     return f"{s} {units[i]}"
 
 
+def parse_size(value) -> int | None:
+    """
+    Parse a byte size such as 1048576, "512K", "50M", "1.5G" or "50MB"
+    (binary units, like human_size). None, 0 and "off" give None (no size).
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) or None
+    text = str(value).strip().upper()
+    if text in ("", "0", "OFF", "NONE"):
+        return None
+    text = text[:-1] if text.endswith("B") else text
+    text = text[:-1] if text.endswith("I") else text
+    units = "KMGTP"
+    factor = 1
+    if text and text[-1] in units:
+        factor = 1024 ** (units.index(text[-1]) + 1)
+        text = text[:-1]
+    try:
+        return int(float(text) * factor) or None
+    except ValueError:
+        raise ValueError(f"Invalid size: {value} (e.g. 1048576, 512K, 50M, 1.5G)") from None
+
+
+#%% Hash
+def file_md5(path, chunksize=1024*1024*8) -> str:
+    # MD5 of a local file, as reported by Drive in md5Checksum
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunksize), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+#%% Local scan
+# One manifest row per local file/folder; mtime is None for folders
+LocalEntry = namedtuple("LocalEntry", ["path", "size", "mtime", "is_dir", "parent"])
+
+
+def scan_local(paths) -> list[LocalEntry]:
+    """
+    Scan local files and folders (recursively) with os.scandir.
+
+    Every entry is stat'ed at most once (folders not at all, thanks to the
+    cached DirEntry type), and the result is a manifest in walk order:
+    each folder is followed by its content. Roots have parent None.
+    """
+    manifest = []
+
+    def walk(folder):
+        with os.scandir(folder) as it:
+            entries = list(it)
+        for entry in entries:
+            path = os.path.join(folder, entry.name)
+            if entry.is_dir():
+                manifest.append(LocalEntry(path, 0, None, True, folder))
+                walk(path)
+            elif entry.is_file():
+                st = entry.stat()
+                manifest.append(LocalEntry(path, st.st_size, st.st_mtime, False, folder))
+            elif not os.path.exists(path):
+                # broken symlink
+                raise FileNotFoundError(f"Local file not found: {path}")
+
+    for path in paths:
+        path = str(path)
+        if os.path.isdir(path):
+            manifest.append(LocalEntry(path, 0, None, True, None))
+            walk(path)
+        elif os.path.isfile(path):
+            st = os.stat(path)
+            manifest.append(LocalEntry(path, st.st_size, st.st_mtime, False, None))
+        else:
+            raise FileNotFoundError(f"Local file not found: {path}")
+    return manifest
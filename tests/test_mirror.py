@@ -0,0 +1,170 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/18 16:40:27
+@Author   :   QuYue
+@File     :   test_mirror.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   tests of the incremental mirror refresh (no network)
+'''
+
+
+#%% Import Packages
+# Basic
+import os
+import sys
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Self-defined
+from gdrivetools.core import GoogleDriveTools
+from gdrivetools.state import MirrorState
+
+
+#%% Fake Drive
+FOLDER = GoogleDriveTools.FOLDER_MIME
+
+
+def folder(file_id, name, parent, **extra):
+    return {"id": file_id, "name": name, "mimeType": FOLDER, "parents": [parent], **extra}
+
+
+def file(file_id, name, parent, md5, **extra):
+    return {"id": file_id, "name": name, "mimeType": "text/plain", "parents": [parent],
+            "md5Checksum": md5, "modifiedTime": "2026-01-01T00:00:00.000Z", **extra}
+
+
+def change(meta, removed=False):
+    return {"changeType": "file", "fileId": meta["id"], "removed": removed, "file": None if removed else meta}
+
+
+class FakeMirror(GoogleDriveTools):
+    # GoogleDriveTools without settings or service: changes, scans and downloads are canned
+    def __init__(self, changes, subtrees=None):
+        self.logger = logging.getLogger("test_mirror")
+        self.errors = []
+        self.changes = changes
+        self.subtrees = subtrees or {}
+        self.downloads = []
+
+    def _list_changes(self, page_token):
+        return self.changes, "token-2"
+
+    def _mark_index_stale(self):
+        pass
+
+    def scan_remote(self, file_ids):
+        return {"roots": file_ids, "nodes": self.subtrees[file_ids[0]]}
+
+    def _download_single(self, file_id, save_dir, chunksize=None, meta=None):
+        self.downloads.append(file_id)
+        os.makedirs(save_dir, exist_ok=True)
+        path = os.path.join(save_dir, meta["name"])
+        with open(path, "w") as f:
+            f.write(file_id)
+        return path
+
+
+def make_mirror(tmp_path) -> MirrorState:
+    # top/
+    #   a.txt (a), docs/ (d1) with b.txt (b), old/ (old) with c.txt (c)
+    items = {
+        "a": {"path": "a.txt", "folder": False, "md5Checksum": "m-a", "modifiedTime": "2026-01-01T00:00:00.000Z"},
+        "d1": {"path": "docs", "folder": True},
+        "b": {"path": os.path.join("docs", "b.txt"), "folder": False, "md5Checksum": "m-b"},
+        "old": {"path": "old", "folder": True},
+        "c": {"path": os.path.join("old", "c.txt"), "folder": False, "md5Checksum": "m-c"},
+    }
+    for item in items.values():
+        path = tmp_path / item["path"]
+        if item["folder"]:
+            path.mkdir(parents=True, exist_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("old")
+    state = MirrorState(str(tmp_path))
+    state.folder_id = "top"
+    state.page_token = "token-1"
+    state.items = items
+    return state
+
+
+def refresh(gdt, tmp_path, state) -> dict:
+    results = {"downloaded": [], "moved": [], "deleted": []}
+    gdt._mirror_changes(str(tmp_path), state, results, chunksize=1024, max_workers=1)
+    return results
+
+
+#%% _mirror_changes
+def test_move_keeps_the_local_copy(tmp_path):
+    state = make_mirror(tmp_path)
+    gdt = FakeMirror([change(file("a", "a.txt", "d1", "m-a"))])
+    results = refresh(gdt, tmp_path, state)
+    assert results["moved"] == [(str(tmp_path / "a.txt"), str(tmp_path / "docs" / "a.txt"))]
+    assert gdt.downloads == []
+    assert (tmp_path / "docs" / "a.txt").read_text() == "old"
+    assert state.items["a"]["path"] == os.path.join("docs", "a.txt")
+    assert state.page_token == "token-2"
+
+
+def test_changed_content_is_downloaded(tmp_path):
+    state = make_mirror(tmp_path)
+    gdt = FakeMirror([change(file("a", "a.txt", "top", "m-a2"))])
+    results = refresh(gdt, tmp_path, state)
+    assert gdt.downloads == ["a"]
+    assert results["downloaded"] == [str(tmp_path / "a.txt")]
+    assert state.items["a"]["md5Checksum"] == "m-a2"
+
+
+def test_delete(tmp_path):
+    state = make_mirror(tmp_path)
+    gdt = FakeMirror([change({"id": "b"}, removed=True)])
+    results = refresh(gdt, tmp_path, state)
+    assert results["deleted"] == [str(tmp_path / "docs" / "b.txt")]
+    assert not (tmp_path / "docs" / "b.txt").exists()
+    assert "b" not in state.items
+
+
+def test_new_nested_folder(tmp_path):
+    state = make_mirror(tmp_path)
+    new, inner, x = folder("n1", "new", "top"), folder("n2", "inner", "n1"), file("x", "x.txt", "n2", "m-x")
+    subtree = {
+        "n1": dict(new, parent=None, children=["n2"]),
+        "n2": dict(inner, parent="n1", children=["x"]),
+        "x": dict(x, parent="n2"),
+    }
+    # The inner folder and its file are reported before the new folder itself
+    gdt = FakeMirror([change(x), change(inner), change(new)], subtrees={"n1": subtree})
+    results = refresh(gdt, tmp_path, state)
+    # The new folder is fetched as a whole, once
+    assert gdt.downloads == ["x"]
+    assert results["downloaded"] == [str(tmp_path / "new" / "inner" / "x.txt")]
+    assert state.items["n2"] == {"path": os.path.join("new", "inner"), "folder": True}
+    assert state.items["x"]["path"] == os.path.join("new", "inner", "x.txt")
+
+
+def test_trashed_parent_removes_its_content(tmp_path):
+    state = make_mirror(tmp_path)
+    gdt = FakeMirror([change(folder("old", "old", "top", trashed=True))])
+    results = refresh(gdt, tmp_path, state)
+    assert results["deleted"] == [str(tmp_path / "old")]
+    assert not (tmp_path / "old").exists()
+    assert "old" not in state.items and "c" not in state.items
+
+
+def test_shared_drive_changes_are_ignored(tmp_path):
+    state = make_mirror(tmp_path)
+    gdt = FakeMirror([{"changeType": "drive", "driveId": "0Ashared", "removed": True}])
+    results = refresh(gdt, tmp_path, state)
+    assert results == {"downloaded": [], "moved": [], "deleted": []}
+    assert len(state.items) == 5
+
+
+def test_failed_download_is_kept_for_retry(tmp_path):
+    state = make_mirror(tmp_path)
+    gdt = FakeMirror([change(file("y", "y.txt", "top", "m-y"))])
+    gdt._download_single = lambda file_id, save_dir, chunksize=None, meta=None: None
+    refresh(gdt, tmp_path, state)
+    assert state.retry == {"y": "y.txt"}
+    # The token moves on: the failed item is retried on its own
+    assert state.page_token == "token-2"
@@ -0,0 +1,95 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/18 17:02:51
+@Author   :   QuYue
+@File     :   test_retry.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   tests of the rate limiter (no network, simulated clock)
+'''
+
+
+#%% Import Packages
+# Basic
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Self-defined
+from gdrivetools import retry
+from gdrivetools.retry import RateLimiter
+
+
+#%% Simulated clock
+class FakeTime:
+    # monotonic() / sleep() of a clock that only moves when slept on
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # A real sleep always lets some time pass
+        seconds = max(seconds, 1e-6)
+        self.now += seconds
+        self.slept += seconds
+
+
+def fake_clock(monkeypatch) -> FakeTime:
+    clock = FakeTime()
+    monkeypatch.setattr(retry, "time", clock)
+    return clock
+
+
+#%% RateLimiter
+def test_open_limiter_does_not_wait(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    limiter = RateLimiter()
+    for _ in range(1000):
+        limiter.acquire(10 ** 6)
+    assert clock.slept == 0
+
+
+def test_pacing_after_the_burst(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    limiter = RateLimiter(rate=10, burst=5)
+    for _ in range(25):
+        limiter.acquire()
+    # 5 calls from the full bucket, the other 20 at 10 per second
+    assert clock.slept == pytest.approx(2.0, abs=0.01)
+
+
+def test_idle_time_does_not_exceed_the_burst(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    limiter = RateLimiter(rate=10, burst=5)
+    clock.now += 60
+    for _ in range(15):
+        limiter.acquire()
+    assert clock.slept == pytest.approx(1.0, abs=0.01)
+
+
+def test_bytes_larger_than_the_bucket(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    limiter = RateLimiter(rate=1000)
+    # A request larger than the bucket goes through once it is full, and is paid for afterwards
+    limiter.acquire(3000)
+    assert clock.slept == 0
+    limiter.acquire(1000)
+    assert clock.slept == pytest.approx(3.0, abs=0.01)
+
+
+def test_set_rate_applies_to_the_next_call(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.acquire()
+    limiter.set_rate(None)
+    limiter.acquire()
+    assert clock.slept == 0
+    limiter.set_rate(100, burst=1)
+    for _ in range(101):
+        limiter.acquire()
+    assert clock.slept == pytest.approx(1.0, abs=0.01)
@@ -0,0 +1,77 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/18 10:12:40
+@Author   :   QuYue
+@File     :   test_state.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   tests of the on-disk state (no network)
+'''
+
+
+#%% Import Packages
+# Basic
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Self-defined
+from gdrivetools.state import MetadataIndex, SyncState
+
+
+#%% MetadataIndex
+FOLDER = "application/vnd.google-apps.folder"
+
+
+def make_index(tmp_path) -> MetadataIndex:
+    index = MetadataIndex(str(tmp_path / "index.sqlite"))
+    index.store_listing("top", [["a", "a.txt", "text/plain", "3", "md5-a", "2026-01-01T00:00:00.000Z", None]])
+    return index
+
+
+def test_apply_change_skips_shared_drive_changes(tmp_path):
+    # changeType "drive" entries carry no fileId
+    index = make_index(tmp_path)
+    index.apply_change({"changeType": "drive", "driveId": "0Ashared", "removed": False})
+    index.apply_change({"changeType": "drive", "driveId": "0Ashared", "removed": True})
+    assert [row[0] for row in index.children("top")] == ["a"]
+    index.close()
+
+
+def test_apply_change_updates_files(tmp_path):
+    index = make_index(tmp_path)
+    index.apply_change({"changeType": "file", "fileId": "b", "removed": False,
+                        "file": {"id": "b", "name": "b.txt", "mimeType": "text/plain", "parents": ["top"]}})
+    index.apply_change({"changeType": "file", "fileId": "a", "removed": True})
+    assert [row[0] for row in index.children("top")] == ["b"]
+    assert index.get("a") is None
+    index.close()
+
+
+#%% SyncState
+def test_sync_state_put_get(tmp_path):
+    state = SyncState(str(tmp_path / "sub" / "sync.sqlite"))
+    path = str(tmp_path / "a.txt")
+    assert state.get(path) is None
+    state.put(path, 3, 1.5, None, "f1")
+    assert state.get(path) == {"size": 3, "mtime": 1.5, "md5": None, "file_id": "f1"}
+    state.put(path, 4, 2.5, "md5-a", "f1")
+    assert state.get(path) == {"size": 4, "mtime": 2.5, "md5": "md5-a", "file_id": "f1"}
+    state.close()
+    # Kept across runs
+    state = SyncState(str(tmp_path / "sub" / "sync.sqlite"))
+    assert state.get(path)["md5"] == "md5-a"
+    state.close()
+
+
+def test_sync_state_prune(tmp_path):
+    state = SyncState(str(tmp_path / "sync.sqlite"))
+    root, other = tmp_path / "root", tmp_path / "root2"
+    for path in (root / "a", root / "b" / "c", other / "d"):
+        state.put(str(path), 1, 1.0, None, path.name)
+    state.prune(str(root), [str(root / "a")])
+    assert state.get(str(root / "a")) is not None
+    assert state.get(str(root / "b" / "c")) is None
+    # A folder whose name starts like root is not under it
+    assert state.get(str(other / "d")) is not None
+    state.close()
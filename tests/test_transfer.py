@@ -0,0 +1,178 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/18 16:05:12
+@Author   :   QuYue
+@File     :   test_transfer.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   tests of the stream uploads (no network)
+'''
+
+
+#%% Import Packages
+# Basic
+import io
+import os
+import sys
+import json
+
+import httplib2
+import pytest
+from googleapiclient.http import HttpRequest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Self-defined
+from gdrivetools import transfer
+from gdrivetools.transfer import AUTO, ChunkTuner, IterStream, StreamUpload, is_stream, parse_chunksize
+
+
+#%% parse_chunksize
+def test_parse_chunksize():
+    assert parse_chunksize(" Auto ") == AUTO
+    assert parse_chunksize(1048576) == 1048576
+    assert parse_chunksize("262144") == 262144
+    with pytest.raises(ValueError):
+        parse_chunksize("fast")
+
+
+#%% ChunkTuner
+MB = 1024 * 1024
+MULTIPLE = 256 * 1024
+
+
+class FakeClock:
+    now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def run_tuner(monkeypatch, rtt, throughput, chunks=12) -> ChunkTuner:
+    # Send chunks over a simulated route where a chunk of n bytes takes rtt + n / throughput seconds
+    clock = FakeClock()
+    monkeypatch.setattr(transfer, "time", clock)
+    tuner = ChunkTuner(MULTIPLE, 128 * MB, multiple=MULTIPLE)
+    for _ in range(chunks):
+        nbytes = tuner.chunksize
+        tuner.start()
+        clock.now += rtt + nbytes / throughput
+        tuner.update(nbytes)
+        assert tuner.chunksize % MULTIPLE == 0
+    return tuner
+
+
+@pytest.mark.parametrize("rtt, throughput, expected", [
+    (0.05, 20 * MB, 40 * MB),   # MIN_SECONDS of data
+    (0.02, 1 * MB, 2 * MB),     # a slow link gets small chunks
+    (0.5, 20 * MB, 128 * MB),   # TARGET_RTTS round trips, capped at the maximum
+])
+def test_chunk_tuner_converges(monkeypatch, rtt, throughput, expected):
+    tuner = run_tuner(monkeypatch, rtt, throughput)
+    assert abs(tuner.chunksize - expected) <= MULTIPLE
+    assert tuner.rtt == pytest.approx(rtt, rel=0.01)
+
+
+def test_chunk_tuner_measures_the_route(monkeypatch):
+    tuner = run_tuner(monkeypatch, 0.05, 20 * MB)
+    assert tuner.throughput == pytest.approx(20 * MB, rel=0.01)
+    assert "RTT 50 ms" in tuner.describe()
+
+
+def test_chunk_tuner_limits_growth(monkeypatch):
+    # One sample cannot separate latency from throughput: the next chunk probes another size
+    clock = FakeClock()
+    monkeypatch.setattr(transfer, "time", clock)
+    tuner = ChunkTuner(MULTIPLE, 1024 * MB, multiple=MULTIPLE)
+    tuner.start()
+    clock.now += 0.01
+    assert tuner.update(ChunkTuner.START) == 2 * ChunkTuner.START
+    tuner.start()
+    clock.now += 0.01
+    assert tuner.update(2 * ChunkTuner.START) == 2 * ChunkTuner.START * ChunkTuner.MAX_GROWTH
+
+
+#%% Fake resumable upload endpoint
+CHUNK = 8
+
+
+class FakeUploadServer:
+    # httplib2-like http that answers a resumable upload like Drive does
+    def __init__(self):
+        self.received = b""
+        self.ranges = []  # Content-Range of every chunk (None if absent)
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        if method == "POST":
+            return httplib2.Response({"status": 200, "location": "https://upload.test/session"}), b""
+        content_range = headers.get("Content-Range")
+        self.ranges.append(content_range)
+        self.received += body or b""
+        if content_range is not None and content_range.endswith("/*"):
+            # Not the last chunk: acknowledge what was received so far
+            return httplib2.Response({"status": 308, "range": "bytes=0-%d" % (len(self.received) - 1)}), b""
+        return httplib2.Response({"status": 200}), json.dumps({"id": "f1", "size": str(len(self.received))}).encode()
+
+
+def upload(media):
+    server = FakeUploadServer()
+    request = HttpRequest(server, lambda resp, content: json.loads(content), "https://upload.test/files",
+                          method="POST", body="{}", headers={}, resumable=media)
+    response = None
+    while response is None:
+        _, response = request.next_chunk()
+    return server, response
+
+
+def sources(data):
+    # The same content as a file, an iterator of uneven blocks and an IterStream
+    blocks = [data[i:i + 3] for i in range(0, len(data), 3)]
+    return {"file": io.BytesIO(data), "iterator": iter(blocks), "iterstream": IterStream(blocks)}
+
+
+#%% StreamUpload
+@pytest.mark.parametrize("kind", ["file", "iterator", "iterstream"])
+@pytest.mark.parametrize("length, ranges", [
+    (0, [None]),
+    (CHUNK, ["bytes 0-7/8"]),
+    (3 * CHUNK, ["bytes 0-7/*", "bytes 8-15/*", "bytes 16-23/24"]),
+    (2 * CHUNK + 5, ["bytes 0-7/*", "bytes 8-15/*", "bytes 16-20/21"]),
+])
+def test_stream_upload(kind, length, ranges):
+    data = bytes(range(length))
+    media = StreamUpload(sources(data)[kind], chunksize=CHUNK)
+    server, response = upload(media)
+    assert server.received == data
+    # The total size is only announced with the last chunk
+    assert server.ranges == ranges
+    assert response == {"id": "f1", "size": str(length)}
+    assert media.size() is None
+
+
+def test_getbytes_reads_ahead_one_byte():
+    media = StreamUpload(io.BytesIO(b"abcdefghijklmnop"), chunksize=CHUNK)
+    assert media.getbytes(0, CHUNK) == b"abcdefgh"
+    assert media.chunksize() == CHUNK
+    assert media.getbytes(CHUNK, CHUNK) == b"ijklmnop"
+    # Nothing follows: the full chunk must look short so that it is sent as the last one
+    assert media.chunksize() == CHUNK + 1
+
+
+def test_getbytes_resends_unacknowledged_bytes():
+    media = StreamUpload(iter([b"abcdefghij", b"klmnop"]), chunksize=CHUNK)
+    assert media.getbytes(0, CHUNK) == b"abcdefgh"
+    # The server kept only 5 bytes: the chunk restarts from there
+    assert media.getbytes(5, CHUNK) == b"fghijklm"
+    with pytest.raises(IOError):
+        media.getbytes(0, CHUNK)
+
+
+#%% IterStream
+def test_iter_stream_read():
+    stream = IterStream([b"abc", b"", bytearray(b"de")], name="x.bin")
+    assert is_stream(stream) and stream.name == "x.bin"
+    assert stream.read(2) == b"ab"
+    # Short read at a block boundary
+    assert stream.read(5) == b"c"
+    assert stream.read() == b"de"
+    assert stream.read(1) == b""
+    assert IterStream([]).read(4) == b""
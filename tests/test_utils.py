@@ -0,0 +1,82 @@
+# -*- encoding: utf-8 -*-
+'''
+@Time     :   2026/10/18 17:31:09
+@Author   :   QuYue
+@File     :   test_utils.py
+@Email    :   quyue1541@gmail.com
+@Desc:    :   tests of the size parser and the local scan (no network)
+'''
+
+
+#%% Import Packages
+# Basic
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Self-defined
+from gdrivetools.utils import parse_size, scan_local
+
+
+#%% parse_size
+@pytest.mark.parametrize("value, expected", [
+    (1048576, 1048576),
+    ("1048576", 1048576),
+    ("512K", 512 * 1024),
+    ("50M", 50 * 1024 ** 2),
+    ("50mb", 50 * 1024 ** 2),
+    ("50MiB", 50 * 1024 ** 2),
+    ("1.5G", int(1.5 * 1024 ** 3)),
+    (" 2T ", 2 * 1024 ** 4),
+])
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, 0, "0", "", "off", "OFF", "none"])
+def test_parse_size_no_limit(value):
+    assert parse_size(value) is None
+
+
+@pytest.mark.parametrize("value", ["fast", "10X", "M"])
+def test_parse_size_invalid(value):
+    with pytest.raises(ValueError):
+        parse_size(value)
+
+
+#%% scan_local
+def test_scan_local(tmp_path):
+    (tmp_path / "top" / "sub").mkdir(parents=True)
+    (tmp_path / "top" / "a.txt").write_bytes(b"abc")
+    (tmp_path / "top" / "sub" / "b.txt").write_bytes(b"")
+    (tmp_path / "c.txt").write_bytes(b"12345")
+    top, sub = str(tmp_path / "top"), os.path.join(str(tmp_path / "top"), "sub")
+    manifest = scan_local([top, tmp_path / "c.txt"])
+    entries = {entry.path: entry for entry in manifest}
+    assert set(entries) == {top, sub, os.path.join(top, "a.txt"), os.path.join(sub, "b.txt"),
+                            str(tmp_path / "c.txt")}
+    # Roots have no parent; folders have no size or mtime
+    assert entries[top].is_dir and entries[top].parent is None and entries[top].mtime is None
+    assert entries[str(tmp_path / "c.txt")].parent is None
+    assert entries[sub].parent == top
+    a = entries[os.path.join(top, "a.txt")]
+    assert (a.size, a.is_dir, a.parent) == (3, False, top)
+    assert a.mtime == os.stat(a.path).st_mtime
+    # Walk order: every folder comes before its content
+    order = [entry.path for entry in manifest]
+    assert order.index(top) < order.index(sub) < order.index(os.path.join(sub, "b.txt"))
+
+
+def test_scan_local_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        scan_local([tmp_path / "missing"])
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="symlinks need privileges on Windows")
+def test_scan_local_broken_symlink(tmp_path):
+    os.symlink(tmp_path / "missing", tmp_path / "link")
+    with pytest.raises(FileNotFoundError):
+        scan_local([tmp_path])